@@ -0,0 +1,108 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api_yamdb.settings import SHARED_CACHE, TOKEN_VERSION_CACHE_TIMEOUT
+from reviews.models import UserRoles
+
+
+User = get_user_model()
+
+
+TOKEN_VERSION_KEY = 'token-version:{user_id}'
+TOKEN_CLAIMS = ('username', 'role', 'is_staff', 'token_version')
+TOKEN_REVOKED = 'Токен отозван: права пользователя изменились.'
+USER_NOT_FOUND = 'Пользователь не найден или неактивен.'
+
+
+def get_access_token(user):
+    """Выпускает access-токен с ролью пользователя в утверждениях."""
+    token = AccessToken.for_user(user)
+    token['username'] = user.username
+    token['role'] = user.role
+    token['is_staff'] = user.is_staff
+    token['token_version'] = user.token_version
+    return token
+
+
+def set_token_version(user_id, token_version):
+    cache.set(
+        TOKEN_VERSION_KEY.format(user_id=user_id),
+        token_version,
+        TOKEN_VERSION_CACHE_TIMEOUT
+    )
+
+
+def clear_token_version(user_id):
+    cache.delete(TOKEN_VERSION_KEY.format(user_id=user_id))
+
+
+def read_token_version(user_id):
+    return User.objects.filter(
+        pk=user_id, is_active=True
+    ).values_list('token_version', flat=True).first()
+
+
+def get_token_version(user_id):
+    """
+    Возвращает текущую версию токенов пользователя из кэша, при промахе
+    читает ее из БД. None - пользователь удален или неактивен.
+
+    Кэш процесса не видит смену прав в других процессах, поэтому без
+    общего кэша версия всегда читается из БД.
+    """
+    if not SHARED_CACHE:
+        return read_token_version(user_id)
+    token_version = cache.get(TOKEN_VERSION_KEY.format(user_id=user_id))
+    if token_version is None:
+        token_version = read_token_version(user_id)
+        if token_version is not None:
+            set_token_version(user_id, token_version)
+    return token_version
+
+
+class RoleTokenUser(TokenUser):
+    """Пользователь, восстановленный из утверждений токена без БД."""
+
+    @cached_property
+    def role(self):
+        return self.token.get('role', UserRoles.USER)
+
+    @property
+    def is_user(self):
+        return self.role == UserRoles.USER
+
+    @property
+    def is_moderator(self):
+        return self.role == UserRoles.MODERATOR
+
+    @property
+    def is_admin(self):
+        return self.is_staff or self.role == UserRoles.ADMIN
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWT-аутентификация без загрузки пользователя из БД.
+
+    Роль берется из подписанных утверждений токена; актуальность прав
+    проверяется сравнением версии токена с версией пользователя в общем
+    кэше (без общего кэша - в БД).
+    Токены без утверждений о роли обрабатываются как раньше, через БД.
+    """
+
+    def get_user(self, validated_token):
+        if not all(claim in validated_token for claim in TOKEN_CLAIMS):
+            return super().get_user(validated_token)
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        token_version = get_token_version(user_id)
+        if token_version is None:
+            raise AuthenticationFailed(USER_NOT_FOUND, code='user_not_found')
+        if token_version != validated_token['token_version']:
+            raise AuthenticationFailed(TOKEN_REVOKED, code='token_revoked')
+        return RoleTokenUser(validated_token)
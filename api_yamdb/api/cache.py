@@ -0,0 +1,81 @@
+import time
+from hashlib import md5
+
+from django.core.cache import cache
+from rest_framework.response import Response
+
+from api_yamdb.settings import LIST_CACHE_TIMEOUT, SHARED_CACHE
+
+
+VERSION_KEY = 'list-cache:{label}:version'
+RESPONSE_KEY = 'list-cache:{label}:{version}:{url}'
+COUNTER_KEY = 'list-cache:{label}:{counter}'
+CACHE_HEADER = 'X-Cache'
+
+
+def get_version(model):
+    key = VERSION_KEY.format(label=model._meta.label_lower)
+    # Начальная версия берется от времени, чтобы после вытеснения ключа
+    # из кэша не переиспользовать номера версий со старыми ответами.
+    cache.add(key, time.time_ns(), None)
+    return cache.get(key)
+
+
+def bump_version(model):
+    """Инвалидирует все закэшированные списки модели."""
+    key = VERSION_KEY.format(label=model._meta.label_lower)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), None)
+
+
+def count(model, counter):
+    key = COUNTER_KEY.format(label=model._meta.label_lower, counter=counter)
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        pass
+
+
+def get_stats(model):
+    """Возвращает счетчики попаданий и промахов кэша списков модели."""
+    label = model._meta.label_lower
+    return {
+        counter: cache.get(
+            COUNTER_KEY.format(label=label, counter=counter), 0
+        )
+        for counter in ('hits', 'misses')
+    }
+
+
+class CachedListMixin:
+    """
+    Кэширует ответ list целиком по URL запроса (search, limit, offset).
+    Ключ содержит версию данных модели, которую увеличивают сигналы
+    создания, изменения и удаления объектов. Без общего кэша
+    (SHARED_CACHE) записи других процессов версию не меняют, поэтому
+    списки читаются из БД.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if not SHARED_CACHE:
+            response = super().list(request, *args, **kwargs)
+            response[CACHE_HEADER] = 'BYPASS'
+            return response
+        model = self.get_queryset().model
+        key = RESPONSE_KEY.format(
+            label=model._meta.label_lower,
+            version=get_version(model),
+            url=md5(request.build_absolute_uri().encode()).hexdigest()
+        )
+        data = cache.get(key)
+        if data is not None:
+            count(model, 'hits')
+            return Response(data, headers={CACHE_HEADER: 'HIT'})
+        count(model, 'misses')
+        response = super().list(request, *args, **kwargs)
+        cache.set(key, response.data, LIST_CACHE_TIMEOUT)
+        response[CACHE_HEADER] = 'MISS'
+        return response
@@ -0,0 +1,64 @@
+from hashlib import md5
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+class ConditionalGetMixin:
+    """
+    Поддержка условных GET-запросов (If-None-Match, If-Modified-Since).
+
+    ETag и Last-Modified строятся по дешевой отметке изменения ресурса
+    из get_change_marker(), поэтому ответ 304 отдается до выполнения
+    основного запроса и сериализации.
+    """
+
+    conditional_actions = ('list', 'retrieve')
+
+    def get_change_marker(self):
+        """
+        Возвращает пару (время последнего изменения, доп. части ETag)
+        или None, если условная обработка невозможна. Время может быть
+        None, если оно сдвигается не при каждом изменении ответа (например,
+        при удалениях): тогда отдается только ETag, без Last-Modified.
+        """
+        raise NotImplementedError
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        marker = (
+            self.get_change_marker()
+            if self.action in self.conditional_actions else None
+        )
+        if marker is None:
+            return handler(request, *args, **kwargs)
+        last_modified, parts = marker
+        etag = quote_etag(md5('|'.join(map(str, (
+            request.get_full_path(),
+            request.accepted_renderer.format,
+            last_modified and last_modified.isoformat(),
+            *parts
+        ))).encode()).hexdigest())
+        timestamp = (
+            None if last_modified is None
+            else int(last_modified.timestamp())
+        )
+        response = get_conditional_response(
+            request, etag=etag, last_modified=timestamp
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if 200 <= response.status_code < 400:
+            response['ETag'] = etag
+            if timestamp is not None:
+                response['Last-Modified'] = http_date(timestamp)
+        return response
@@ -0,0 +1,14 @@
+from api_yamdb.settings import PURGE_SYNC_LIMIT
+from reviews.purge import delete_or_mark
+
+
+class SoftDeleteMixin:
+    """
+    Объект с небольшим числом зависимых строк удаляется сразу.
+    Крупный объект помечается удаленным и сразу скрывается из API,
+    а зависимые строки частями удаляет в фоне команда purge_deleted,
+    поэтому запрос не держит блокировку записи на время каскада.
+    """
+
+    def perform_destroy(self, instance):
+        delete_or_mark(instance, PURGE_SYNC_LIMIT)
@@ -0,0 +1,76 @@
+from django.db.models import Count, F
+from rest_framework.exceptions import ValidationError
+
+from reviews.models import Category, Genre
+
+
+UNKNOWN_FACETS = 'Неизвестные фасеты: {names}. Допустимые: {choices}.'
+
+
+def genre_facet(titles):
+    return Genre.objects.filter(titles__in=titles).values(
+        'slug', 'name'
+    ).annotate(count=Count('titles')).order_by('-count', 'slug')
+
+
+def category_facet(titles):
+    return Category.objects.filter(
+        titles__in=titles, deleted_at__isnull=True
+    ).values('slug', 'name').annotate(
+        count=Count('titles')
+    ).order_by('-count', 'slug')
+
+
+def year_facet(titles):
+    return titles.values(value=F('year')).annotate(
+        count=Count('pk')
+    ).order_by('-value')
+
+
+TITLE_FACETS = {
+    'genre': genre_facet,
+    'category': category_facet,
+    'year': year_facet,
+}
+
+
+class FacetedListMixin:
+    """
+    Добавляет к ответу list счетчики по фасетам из параметра
+    facets=genre,category,year для текущего набора фильтров.
+
+    Каждый фасет считается одним запросом с GROUP BY по произведениям,
+    отобранным фильтрами: они берутся подзапросом по их id без сортировки
+    и пагинации.
+    """
+
+    facets_query_param = 'facets'
+    # Имя фасета -> функция, строящая по queryset сгруппированные счетчики.
+    facets = {}
+
+    def list(self, request, *args, **kwargs):
+        names = self.get_facet_names(request)
+        response = super().list(request, *args, **kwargs)
+        if names and response.status_code == 200:
+            queryset = self.filter_queryset(self.get_queryset())
+            matched = queryset.model.objects.filter(
+                pk__in=queryset.order_by().values('pk')
+            )
+            response.data['facets'] = {
+                name: list(self.facets[name](matched)) for name in names
+            }
+        return response
+
+    def get_facet_names(self, request):
+        value = request.query_params.get(self.facets_query_param, '')
+        names = list(dict.fromkeys(
+            name.strip() for name in value.split(',') if name.strip()
+        ))
+        unknown = [name for name in names if name not in self.facets]
+        if unknown:
+            raise ValidationError({self.facets_query_param: [
+                UNKNOWN_FACETS.format(
+                    names=', '.join(unknown), choices=', '.join(self.facets)
+                )
+            ]})
+        return names
@@ -1,16 +1,124 @@
 import django_filters
+from django.db.models import Count
 
-from reviews.models import Title
+from api_yamdb.settings import TITLE_POSTINGS_MAX_IDS
+from reviews.models import Category, Title
+from reviews.postings import postings
+from reviews.search import search_titles
+
+
+GENRE_MODES = (('any', 'Любой из жанров'), ('all', 'Все жанры'))
+
+
+def split_slugs(value):
+    return list(dict.fromkeys(
+        slug.strip() for slug in value.split(',') if slug.strip()
+    ))
 
 
 class TitleFilter(django_filters.FilterSet):
-    """Фильтры для произведений."""
+    """
+    Фильтры для произведений.
+
+    genre и category принимают несколько слагов через запятую; жанры
+    объединяются по «или» либо, при genre_mode=all, по «и». Связи
+    проверяются подзапросами IN по таблице связей, поэтому произведения
+    в выдаче не повторяются.
+
+    Запрос только с фильтрами по жанрам, категориям и годам сначала
+    решается пересечением списков id из индекса в памяти; если найдено
+    немного произведений, они выбираются по первичному ключу.
+    """
 
-    category = django_filters.CharFilter(field_name='category__slug')
-    genre = django_filters.CharFilter(field_name='genre__slug')
-    name = django_filters.CharFilter(lookup_expr='icontains')
+    category = django_filters.CharFilter(method='filter_category')
+    genre = django_filters.CharFilter(method='filter_genre')
+    genre_mode = django_filters.ChoiceFilter(
+        choices=GENRE_MODES, method='filter_genre_mode'
+    )
+    name = django_filters.CharFilter(method='filter_name')
     year = django_filters.NumberFilter()
+    year_min = django_filters.NumberFilter(
+        field_name='year', lookup_expr='gte'
+    )
+    year_max = django_filters.NumberFilter(
+        field_name='year', lookup_expr='lte'
+    )
 
     class Meta:
         model = Title
-        fields = ('category', 'genre', 'name', 'year')
+        fields = (
+            'category', 'genre', 'genre_mode', 'name',
+            'year', 'year_min', 'year_max'
+        )
+
+    def filter_queryset(self, queryset):
+        ids = self.find_in_postings()
+        if ids is None:
+            return super().filter_queryset(queryset)
+        return queryset.filter(pk__in=ids)
+
+    def find_in_postings(self):
+        """
+        Id подходящих произведений из индекса в памяти или None, если
+        запрос нельзя или невыгодно решить по индексу.
+        """
+        data = self.form.cleaned_data
+        if data.get('name'):
+            return None
+        genres = split_slugs(data.get('genre') or '')
+        categories = split_slugs(data.get('category') or '')
+        years = {
+            key: data.get(key) for key in ('year', 'year_min', 'year_max')
+            if data.get(key) is not None
+        }
+        if any(value % 1 for value in years.values()):
+            return None
+        lower = [
+            int(years[key]) for key in ('year', 'year_min') if key in years
+        ]
+        upper = [
+            int(years[key]) for key in ('year', 'year_max') if key in years
+        ]
+        if not (genres or categories or lower or upper):
+            return None
+        return postings.find(
+            genres=genres,
+            genre_mode=data.get('genre_mode') or 'any',
+            categories=categories,
+            year_min=max(lower) if lower else None,
+            year_max=min(upper) if upper else None,
+            limit=TITLE_POSTINGS_MAX_IDS
+        )
+
+    def filter_category(self, queryset, name, value):
+        slugs = split_slugs(value)
+        if not slugs:
+            return queryset
+        return queryset.filter(category__in=Category.objects.filter(
+            slug__in=slugs, deleted_at__isnull=True
+        ).values('pk'))
+
+    def filter_genre(self, queryset, name, value):
+        slugs = split_slugs(value)
+        if not slugs:
+            return queryset
+        links = Title.genre.through.objects.filter(genre__slug__in=slugs)
+        if self.form.cleaned_data.get('genre_mode') == 'all':
+            links = links.values('title_id').annotate(
+                genres=Count('genre_id')
+            ).filter(genres=len(slugs))
+        return queryset.filter(pk__in=links.values('title_id'))
+
+    def filter_genre_mode(self, queryset, name, value):
+        # Режим применяется в filter_genre.
+        return queryset
+
+    def filter_name(self, queryset, name, value):
+        """
+        Поиск по префиксам слов названия через FTS5 с сортировкой по
+        релевантности; без FTS5 - поиск подстроки, как раньше.
+        """
+        found = search_titles(queryset, value)
+        if found is None:
+            return queryset.filter(name__icontains=value)
+        return found
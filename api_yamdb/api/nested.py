@@ -0,0 +1,38 @@
+from django.shortcuts import get_object_or_404
+
+from reviews.models import Review, Title
+
+
+class NestedResourceMixin:
+    """
+    Разрешает родительские объекты вложенного маршрута
+    /titles/{title_id}/reviews/{review_id}/ один раз за запрос.
+
+    Отзыв загружается вместе с произведением одним запросом с JOIN
+    и только если он относится к произведению из адреса и не скрыт
+    модератором, а произведение и автор не удалены, иначе - 404.
+    Найденные объекты кэшируются на view, который создается на каждый
+    запрос заново.
+    """
+
+    def get_title(self):
+        if not hasattr(self, '_title'):
+            self._title = get_object_or_404(
+                Title,
+                id=self.kwargs.get('title_id'),
+                deleted_at__isnull=True
+            )
+        return self._title
+
+    def get_review(self):
+        if not hasattr(self, '_review'):
+            self._review = get_object_or_404(
+                Review.objects.select_related('title').filter(
+                    is_hidden=False, title__deleted_at__isnull=True,
+                    author__deleted_at__isnull=True
+                ),
+                id=self.kwargs.get('review_id'),
+                title_id=self.kwargs.get('title_id')
+            )
+            self._title = self._review.title
+        return self._review
@@ -0,0 +1,185 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+INVALID_CURSOR = 'Некорректный курсор пагинации.'
+
+
+class LimitOffsetOrCursorPagination(LimitOffsetPagination):
+    """
+    Пагинация limit/offset с опциональным курсорным (keyset) режимом.
+
+    Курсорный режим включается параметром `cursor` (для первой страницы
+    достаточно пустого значения). Страница выбирается условием по полям
+    сортировки модели, дополненным первичным ключом, поэтому стоимость
+    запроса не зависит от глубины страницы, а COUNT(*) не выполняется.
+    """
+
+    cursor_query_param = 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.use_cursor = self.cursor_query_param in request.query_params
+        if not self.use_cursor:
+            return super().paginate_queryset(queryset, request, view)
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.model = queryset.model
+        self.ordering = self.get_ordering(queryset)
+        reverse, position = self.decode_cursor(request)
+        ordering = (
+            [(name, not descending) for name, descending in self.ordering]
+            if reverse else self.ordering
+        )
+        queryset = queryset.order_by(*(
+            f'-{name}' if descending else name
+            for name, descending in ordering
+        ))
+        if position is not None:
+            try:
+                queryset = queryset.filter(self.get_position_filter(
+                    ordering, position
+                ))
+            except (ValidationError, ValueError):
+                raise NotFound(INVALID_CURSOR)
+        page = list(queryset[:self.limit + 1])
+        has_more = len(page) > self.limit
+        page = page[:self.limit]
+        if reverse:
+            page.reverse()
+        has_next = position is not None if reverse else has_more
+        has_previous = has_more if reverse else position is not None
+        self.next_position = (
+            self.get_position(page[-1]) if page and has_next else None
+        )
+        self.previous_position = (
+            self.get_position(page[0]) if page and has_previous else None
+        )
+        return page
+
+    def get_paginated_response(self, data):
+        if not self.use_cursor:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict((
+            ('next', self.get_cursor_link(False, self.next_position)),
+            ('previous', self.get_cursor_link(True, self.previous_position)),
+            ('results', data),
+        )))
+
+    def get_ordering(self, queryset):
+        """
+        Возвращает пары (поле, по убыванию) для сортировки queryset,
+        дополненные первичным ключом, если ни одно поле не уникально.
+        Сортировка по аннотациям заменяется сортировкой модели.
+        """
+        model = queryset.model
+        ordering = [
+            (name.lstrip('-'), name.startswith('-'))
+            for name in queryset.query.order_by
+        ]
+        if not ordering or not all(
+            self.is_model_field(model, name) for name, _ in ordering
+        ):
+            ordering = [
+                (name.lstrip('-'), name.startswith('-'))
+                for name in model._meta.ordering or ('pk',)
+            ]
+        if not any(
+            name == 'pk' or model._meta.get_field(name).unique
+            for name, _ in ordering
+        ):
+            ordering.append(('pk', ordering[-1][1]))
+        return ordering
+
+    @staticmethod
+    def is_model_field(model, name):
+        if name == 'pk':
+            return True
+        try:
+            model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return False
+        return True
+
+    def get_position(self, obj):
+        position = []
+        for name, _ in self.ordering:
+            if name == 'pk':
+                position.append(str(obj.pk))
+                continue
+            field = obj._meta.get_field(name)
+            position.append(
+                None if field.value_from_object(obj) is None
+                else field.value_to_string(obj)
+            )
+        return position
+
+    def get_position_filter(self, ordering, position):
+        """
+        Строит условие «строго после позиции» в лексикографическом
+        порядке полей сортировки.
+        """
+        condition = Q()
+        equal = Q()
+        for (name, descending), value in zip(ordering, position):
+            condition |= equal & self.get_after_filter(
+                name, descending, value
+            )
+            equal &= Q(**{f'{name}__isnull': True} if value is None else {
+                name: value
+            })
+        return condition
+
+    def get_after_filter(self, name, descending, value):
+        """
+        Условие «поле строго после значения». SQLite считает NULL
+        меньше любого значения: по возрастанию NULL идут первыми,
+        по убыванию - последними.
+        """
+        nullable = name != 'pk' and self.model._meta.get_field(name).null
+        if value is None:
+            return (
+                Q(pk__in=()) if descending
+                else Q(**{f'{name}__isnull': False})
+            )
+        after = Q(**{f'{name}__{"lt" if descending else "gt"}': value})
+        if descending and nullable:
+            after |= Q(**{f'{name}__isnull': True})
+        return after
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return False, None
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            reverse, position = bool(cursor['r']), cursor['p']
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(INVALID_CURSOR)
+        if (
+            not isinstance(position, list)
+            or len(position) != len(self.ordering)
+            or not all(
+                value is None or isinstance(value, str) for value in position
+            )
+        ):
+            raise NotFound(INVALID_CURSOR)
+        return reverse, position
+
+    def get_cursor_link(self, reverse, position):
+        if position is None:
+            return None
+        encoded = urlsafe_b64encode(json.dumps(
+            {'r': int(reverse), 'p': position}
+        ).encode('utf-8')).decode('ascii')
+        url = remove_query_param(
+            self.request.build_absolute_uri(), self.offset_query_param
+        )
+        return replace_query_param(url, self.cursor_query_param, encoded)
@@ -0,0 +1,33 @@
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+NDJSON_ERROR = 'Ошибка разбора NDJSON в строке {line}: {error}'
+
+
+class NDJSONParser(BaseParser):
+    """Разбирает поток JSON-объектов по одному на строку в список."""
+
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get(
+            'encoding', settings.DEFAULT_CHARSET
+        )
+        items = []
+        if stream is None:
+            return items
+        for number, line in enumerate(stream, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                items.append(json.loads(line.decode(encoding)))
+            except ValueError as error:
+                raise ParseError(NDJSON_ERROR.format(
+                    line=number, error=error
+                ))
+        return items
@@ -11,6 +11,18 @@ class IsAdmin(BasePermission):
         return request.user.is_authenticated and request.user.is_admin
 
 
+class IsAdminOrModerator(BasePermission):
+    """
+    Класс, определяющий необходимость аутентификации администратора
+    или модератора для доступа к действиям на ресурсе.
+    """
+
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and (
+            request.user.is_admin or request.user.is_moderator
+        )
+
+
 class IsAdminOrReadOnly(IsAdmin):
     """
     Класс, определяющий права доступа к вьюсетам следующий образом:
@@ -47,7 +59,7 @@ class IsAdminOrModeratorOrAuthorAllOrReadOnly(
     def has_object_permission(self, request, view, obj):
         return (
             request.method in SAFE_METHODS
-            or obj.author == request.user
+            or obj.author_id == request.user.pk
             or request.user.is_admin
             or request.user.is_moderator
         )
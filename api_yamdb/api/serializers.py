@@ -1,28 +1,31 @@
 from django.contrib.auth import get_user_model
-from django.shortcuts import get_object_or_404
+from django.db import connections, router, transaction
+from django.db.models import CharField, Value
+from django.db.models.signals import m2m_changed
 from django.utils import timezone
 from rest_framework import serializers
 from rest_framework.relations import SlugRelatedField
 
+from .cache import bump_version
 from api_yamdb.settings import (
     LENGTH_CONFIRMATION_CODE,
     MAX_LENGTH_USERNAME,
-    MAX_LENGTH_EMAIL
+    MAX_LENGTH_EMAIL,
+    MODERATION_MAX_ITEMS
 )
 from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.postings import invalidate_postings
+from reviews.suggest import invalidate_names
 from reviews.validators import validate_username
 
 
 User = get_user_model()
 
 
+MODERATION_EMPTY = 'Укажите id отзывов или комментариев.'
 YEAR_MORE_CURRENT = (
     'Год выпуска {year} не может быть больше текущего {current_year}!'
 )
-REVIEW_IS_ONE = (
-    'Пользователь не может оставить более одного отзыва '
-    'на каждое произведение.'
-)
 
 
 class ReviewSerializer(serializers.ModelSerializer):
@@ -34,18 +37,6 @@ class ReviewSerializer(serializers.ModelSerializer):
         fields = ('id', 'text', 'author', 'score', 'pub_date')
         model = Review
 
-    def validate(self, data):
-        if self.context['request'].method != 'POST':
-            return data
-        if Review.objects.filter(
-            author=self.context['request'].user,
-            title=get_object_or_404(
-                Title, id=self.context['view'].kwargs.get('title_id')
-            )
-        ):
-            raise serializers.ValidationError(REVIEW_IS_ONE)
-        return data
-
 
 class CommentSerializer(serializers.ModelSerializer):
     """Сериализатор для комментариев к отзывам."""
@@ -88,17 +79,38 @@ class TitleGetSerializer(serializers.ModelSerializer):
         )
         read_only_fields = fields
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Категория, помеченная удаленной, скрывается еще до очистки.
+        if instance.category is not None and instance.category.deleted_at:
+            data['category'] = None
+        return data
+
+
+class SlugReferenceField(serializers.SlugRelatedField):
+    """
+    Слаг связанного объекта. Объекты по слагам находит сериализатор
+    одним запросом сразу для всех полей, см. TitleSerializer.validate.
+    """
+
+    def to_internal_value(self, data):
+        if not isinstance(data, str):
+            self.fail('invalid')
+        return data
+
 
 class TitleSerializer(serializers.ModelSerializer):
     """Сериализатор для произведений."""
 
-    genre = serializers.SlugRelatedField(
+    reference_fields = ('genre', 'category')
+
+    genre = SlugReferenceField(
         queryset=Genre.objects.all(),
         slug_field='slug',
         many=True,
     )
-    category = serializers.SlugRelatedField(
-        queryset=Category.objects.all(),
+    category = SlugReferenceField(
+        queryset=Category.objects.filter(deleted_at__isnull=True),
         slug_field='slug',
     )
 
@@ -109,6 +121,142 @@ class TitleSerializer(serializers.ModelSerializer):
             'category', 'genre'
         )
 
+    def validate(self, data):
+        # При пакетной загрузке слаги всех элементов разрешает view.
+        if not self.context.get('defer_references'):
+            errors = self.resolve_references([data])[0]
+            if errors:
+                raise serializers.ValidationError(errors)
+        return data
+
+    def resolve_references(self, items):
+        """
+        Находит жанры и категории по слагам всех элементов items одним
+        запросом UNION ALL и заменяет слаги объектами с id и слагом.
+        Возвращает список ошибок по элементам.
+        """
+        queries, fields = [], {}
+        for name in self.reference_fields:
+            field = self.fields[name]
+            related = getattr(field, 'child_relation', field)
+            slugs = set()
+            for data in items:
+                if name in data:
+                    slugs.update(data[name] if related is not field
+                                 else [data[name]])
+            if not slugs:
+                continue
+            fields[name] = related
+            queries.append(related.get_queryset().filter(**{
+                f'{related.slug_field}__in': sorted(slugs)
+            }).annotate(
+                reference=Value(name, output_field=CharField())
+            ).order_by().values_list(
+                'reference', 'pk', related.slug_field
+            ))
+        found = {
+            (name, slug): pk
+            for name, pk, slug in queries[0].union(*queries[1:], all=True)
+        } if queries else {}
+        errors = [{} for _ in items]
+        for data, item_errors in zip(items, errors):
+            for name, related in fields.items():
+                if name not in data:
+                    continue
+                many = related is not self.fields[name]
+                model = related.get_queryset().model
+                objects = []
+                for slug in dict.fromkeys(
+                    data[name] if many else [data[name]]
+                ):
+                    if (name, slug) not in found:
+                        item_errors.setdefault(name, []).append(
+                            related.error_messages['does_not_exist'].format(
+                                slug_name=related.slug_field, value=slug
+                            )
+                        )
+                        continue
+                    objects.append(model(**{
+                        'pk': found[name, slug], related.slug_field: slug
+                    }))
+                data[name] = objects if many else (
+                    objects[0] if objects else None
+                )
+        return errors
+
+    @transaction.atomic
+    def create(self, validated_data):
+        genres = validated_data.pop('genre', [])
+        title = Title.objects.create(**validated_data)
+        self.write_genres(title, genres, created=True)
+        return title
+
+    @transaction.atomic
+    def create_many(self, items):
+        """
+        Создает произведения пачкой: строки вставляются одним bulk_create,
+        связи с жанрами - одним bulk_create промежуточной модели.
+        """
+        genres = [data.pop('genre', []) for data in items]
+        titles = [Title(**data) for data in items]
+        if connections[
+            router.db_for_write(Title)
+        ].features.can_return_rows_from_bulk_insert:
+            Title.objects.bulk_create(titles)
+        else:
+            # Без RETURNING id вставленных строк неизвестны.
+            for title in titles:
+                title.save()
+        through = Title.genre.through
+        through.objects.bulk_create(
+            through(title_id=title.pk, genre_id=genre.pk)
+            for title, title_genres in zip(titles, genres)
+            for genre in title_genres
+        )
+        # Строки и связи вставлены без сигналов.
+        invalidate_postings()
+        invalidate_names()
+        transaction.on_commit(lambda: bump_version(Title))
+        return titles
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        genres = validated_data.pop('genre', None)
+        instance = super().update(instance, validated_data)
+        if genres is not None:
+            self.write_genres(instance, genres)
+        return instance
+
+    @staticmethod
+    def write_genres(title, genres, created=False):
+        """
+        Приводит жанры произведения к списку genres: лишние связи
+        удаляются одним DELETE, новые вставляются одним bulk_create,
+        неизменившиеся не трогаются.
+        """
+        new_ids = {genre.pk for genre in genres}
+        old_ids = set() if created else set(
+            title.genre.values_list('pk', flat=True)
+        )
+        removed, added = old_ids - new_ids, new_ids - old_ids
+        if removed:
+            title.genre.remove(*removed)
+        if not added:
+            return
+        # RelatedManager.add() перед вставкой проверяет существующие
+        # связи отдельным запросом, разница здесь уже известна.
+        through = Title.genre.through
+        signal = {
+            'sender': through, 'instance': title, 'reverse': False,
+            'model': Genre, 'pk_set': added, 'using': title._state.db
+        }
+        m2m_changed.send(action='pre_add', **signal)
+        through.objects.bulk_create(
+            through(title_id=title.pk, genre_id=genre_id)
+            for genre_id in sorted(added)
+        )
+        m2m_changed.send(action='post_add', **signal)
+
     def validate_year(self, year):
         current_year = timezone.now().year
         if year > current_year:
@@ -119,6 +267,27 @@ class TitleSerializer(serializers.ModelSerializer):
         return year
 
 
+class ModerationSerializer(serializers.Serializer):
+    """Сериализатор пакетного действия модератора."""
+
+    action = serializers.ChoiceField(choices=('delete', 'hide'))
+    reviews = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        max_length=MODERATION_MAX_ITEMS,
+        default=list
+    )
+    comments = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        max_length=MODERATION_MAX_ITEMS,
+        default=list
+    )
+
+    def validate(self, data):
+        if not data['reviews'] and not data['comments']:
+            raise serializers.ValidationError(MODERATION_EMPTY)
+        return data
+
+
 class SignUpDataSerializer(serializers.Serializer):
     """Сериализатор для даннных пользователя при регистрации."""
 
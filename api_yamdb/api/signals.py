@@ -0,0 +1,48 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import clear_token_version, set_token_version
+from .cache import bump_version
+from reviews.models import (
+    Category, Genre, Review, Title, User, rating_recalculated
+)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def invalidate_description_lists(sender, **kwargs):
+    bump_version(sender)
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+@receiver(m2m_changed, sender=Title.genre.through)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+@receiver(rating_recalculated, sender=Title)
+def invalidate_title_list(sender, **kwargs):
+    """
+    Меняет версию списка произведений, входящую в его ETag: записи
+    произведений, их жанров и отзывов (рейтинг) меняют ответ списка.
+    Версия меняется после фиксации, чтобы ETag новой версии не достался
+    ответу, прочитанному до нее.
+    """
+    transaction.on_commit(lambda: bump_version(Title))
+
+
+@receiver(post_save, sender=User)
+def refresh_token_version(sender, instance, **kwargs):
+    # Неактивному пользователю версия не кэшируется: проверка токена
+    # обратится к БД, которая его отклонит.
+    if not instance.is_active:
+        clear_token_version(instance.pk)
+        return
+    set_token_version(instance.pk, instance.token_version)
+
+
+@receiver(post_delete, sender=User)
+def revoke_user_tokens(sender, instance, **kwargs):
+    clear_token_version(instance.pk)
@@ -6,7 +6,9 @@ from .views import (
     APISignUp,
     CategoryViewSet,
     CommentViewSet,
+    ExportView,
     GenreViewSet,
+    ModerationView,
     ReviewViewSet,
     TitleViewSet,
     UserViewSet
@@ -44,5 +46,11 @@ router_v1.register('users', UserViewSet, basename='users')
 
 urlpatterns = [
     path('v1/', include(router_v1.urls)),
-    path('v1/auth/', include(auth_urls))
+    path('v1/auth/', include(auth_urls)),
+    path('v1/moderation/', ModerationView.as_view(), name='moderation'),
+    path(
+        'v1/export/<slug:table>.<slug:output>',
+        ExportView.as_view(),
+        name='export'
+    )
 ]
@@ -1,6 +1,5 @@
-from django.core.mail import send_mail
-
 from api_yamdb.settings import FROM_EMAIL
+from reviews.outbox import enqueue_email
 
 
 MESSAGE = (
@@ -10,14 +9,13 @@ MESSAGE = (
 
 
 def send_confirmation_code(email, confirmation_code, username):
-    """Функция отправки кода подтверждения на почту."""
-    send_mail(
+    """Функция постановки письма с кодом подтверждения в очередь."""
+    enqueue_email(
         subject='Код подтверждения',
-        message=MESSAGE.format(
+        body=MESSAGE.format(
             username=username,
             confirmation_code=confirmation_code
         ),
         from_email=FROM_EMAIL,
-        recipient_list=(email,),
-        fail_silently=False
+        recipient=email
     )
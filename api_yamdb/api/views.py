@@ -1,26 +1,38 @@
 from random import choices
 
 from django.contrib.auth import get_user_model
-from django.db import IntegrityError
-from django.db.models import Avg
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
-from rest_framework.filters import SearchFilter
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.filters import OrderingFilter, SearchFilter
 from rest_framework.generics import CreateAPIView
 from rest_framework.mixins import (
     CreateModelMixin,
     DestroyModelMixin,
     ListModelMixin
 )
+from rest_framework.parsers import JSONParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
-
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
+
+from .authentication import get_access_token
+from .cache import CachedListMixin, get_stats, get_version
+from .conditional import ConditionalGetMixin
+from .deletion import SoftDeleteMixin
+from .facets import TITLE_FACETS, FacetedListMixin
 from .filters import TitleFilter
+from .nested import NestedResourceMixin
+from .parsers import NDJSONParser
 from .permissions import (
     IsAdmin,
+    IsAdminOrModerator,
     IsAdminOrReadOnly,
     IsAdminOrModeratorOrAuthorAllOrReadOnly
 )
@@ -29,6 +41,7 @@ from .serializers import (
     CommentSerializer,
     GenreSerializer,
     GetTokenSerializer,
+    ModerationSerializer,
     ReviewSerializer,
     SignUpDataSerializer,
     TitleGetSerializer,
@@ -39,11 +52,33 @@ from .serializers import (
 from .utils import send_confirmation_code
 from api_yamdb.settings import (
     DEFAULT_CONFIRMATION_CODE,
+    EXPORT_CHUNK_SIZE,
+    LEADERBOARD_MAX_SIZE,
+    LEADERBOARD_SIZE,
     LENGTH_CONFIRMATION_CODE,
+    SHARED_CACHE,
+    SUGGEST_MAX_SIZE,
+    SUGGEST_SIZE,
     SYMBOLS_CONFIRMATION_CODE,
+    TITLE_BULK_MAX_ITEMS,
     USER_ENDPOINT_SUFFIX,
 )
-from reviews.models import Category, Genre, Review, Title
+from reviews.exporter import (
+    EXPORT_FILES,
+    EXPORT_FORMATS,
+    export_chunks,
+    export_name
+)
+from reviews.models import (
+    Category,
+    Comment,
+    Genre,
+    Review,
+    ScoreHistogram,
+    Title
+)
+from reviews.purge import delete_rows
+from reviews.suggest import title_names
 
 
 User = get_user_model()
@@ -52,46 +87,83 @@ User = get_user_model()
 CODE_NOT_VALID = 'Ваш код подтверждения не действителен! Получите его заново.'
 EMAIL_ERROR = 'Ошибка! Email "{email}" уже используется!'
 USERNAME_ERROR = 'Ошибка! Никнейм "{username}" уже используется!'
-
-
-class ReviewViewSet(viewsets.ModelViewSet):
+USER_DELETED = 'Ошибка! Пользователь с такими данными удален.'
+REVIEW_IS_ONE = (
+    'Пользователь не может оставить более одного отзыва '
+    'на каждое произведение.'
+)
+BULK_NOT_A_LIST = 'Ожидается непустой список произведений.'
+BULK_TOO_LARGE = 'За один запрос можно создать не больше {limit} произведений.'
+LEADERBOARD_BAD_ORDER = 'Допустимые значения: {choices}.'
+BAD_LIMIT = 'Ожидается целое число от 1 до {limit}.'
+# Поля, по которым строятся рейтинги лидеров.
+LEADERBOARD_ORDERINGS = {
+    'rating': 'rating',
+    'weighted': 'weighted_rating',
+}
+SUGGEST_EMPTY_QUERY = 'Укажите начало названия в параметре q.'
+EXPORT_NOT_FOUND = 'Выгрузка "{name}" не найдена.'
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+
+
+class ReviewViewSet(ConditionalGetMixin, NestedResourceMixin,
+                    viewsets.ModelViewSet):
     """ViewSet для отзывов."""
 
     serializer_class = ReviewSerializer
     permission_classes = (IsAdminOrModeratorOrAuthorAllOrReadOnly,)
     http_method_names = ('delete', 'get', 'patch', 'post', 'head', 'options')
+    conditional_actions = ('list',)
 
-    def get_title(self):
-        return get_object_or_404(Title, id=self.kwargs.get('title_id'))
+    def get_change_marker(self):
+        # Любое изменение отзыва отмечается в updated_at произведения.
+        return self.get_title().updated_at, ()
 
     def get_queryset(self):
-        return self.get_title().reviews.all()
+        # Имя автора выводится в сериализаторе, загружаем его тем же JOIN.
+        return Review.objects.filter(
+            title=self.get_title(), is_hidden=False,
+            author__deleted_at__isnull=True
+        ).select_related('author')
 
     def perform_create(self, serializer):
-        serializer.save(
-            author=self.request.user,
-            title=self.get_title()
-        )
+        # Повторный отзыв отсекает ограничение unique_author_title.
+        try:
+            serializer.save(
+                author_id=self.request.user.pk,
+                title=self.get_title()
+            )
+        except IntegrityError:
+            raise ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: [REVIEW_IS_ONE]}
+            )
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(NestedResourceMixin, viewsets.ModelViewSet):
     """ViewSet для комментариев."""
 
     serializer_class = CommentSerializer
     permission_classes = (IsAdminOrModeratorOrAuthorAllOrReadOnly,)
     http_method_names = ('delete', 'get', 'patch', 'post', 'head', 'options')
 
-    def get_review(self):
-        return get_object_or_404(Review, id=self.kwargs.get('review_id'))
-
     def get_queryset(self):
-        return self.get_review().comments.all()
+        return Comment.objects.filter(
+            review=self.get_review(), is_hidden=False,
+            author__deleted_at__isnull=True
+        ).select_related('author')
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, review=self.get_review())
+        serializer.save(
+            author_id=self.request.user.pk,
+            review=self.get_review()
+        )
 
 
-class BaseDescriptionViewSet(CreateModelMixin,
+class BaseDescriptionViewSet(CachedListMixin,
+                             CreateModelMixin,
                              DestroyModelMixin,
                              ListModelMixin,
                              viewsets.GenericViewSet):
@@ -102,11 +174,23 @@ class BaseDescriptionViewSet(CreateModelMixin,
     search_fields = ('name',)
     lookup_field = 'slug'
 
+    @action(
+        methods=['GET'],
+        detail=False,
+        permission_classes=(IsAdmin,),
+        url_path='cache-stats',
+    )
+    def cache_stats(self, request):
+        return Response(
+            get_stats(self.get_queryset().model),
+            status=status.HTTP_200_OK
+        )
 
-class CategoryViewSet(BaseDescriptionViewSet):
+
+class CategoryViewSet(SoftDeleteMixin, BaseDescriptionViewSet):
     """ViewSet для категорий."""
 
-    queryset = Category.objects.all()
+    queryset = Category.objects.filter(deleted_at__isnull=True)
     serializer_class = CategorySerializer
 
 
@@ -117,23 +201,184 @@ class GenreViewSet(BaseDescriptionViewSet):
     serializer_class = GenreSerializer
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(ConditionalGetMixin, FacetedListMixin, SoftDeleteMixin,
+                   viewsets.ModelViewSet):
     """ViewSet для произведений."""
 
-    queryset = Title.objects.annotate(
-        rating=Avg('reviews__score')
-    ).order_by('name')
+    queryset = Title.objects.filter(
+        deleted_at__isnull=True
+    ).select_related('category').prefetch_related('genre')
 
     permission_classes = (IsAdminOrReadOnly,)
-    filter_backends = (DjangoFilterBackend,)
+    filter_backends = (DjangoFilterBackend, OrderingFilter)
     filterset_class = TitleFilter
+    ordering_fields = ('name', 'year', 'rating', 'weighted_rating')
+    facets = TITLE_FACETS
     http_method_names = ('get', 'post', 'delete', 'head', 'option', 'patch')
 
     def get_serializer_class(self):
-        if self.action in ('list', 'retrieve'):
+        if self.action in ('list', 'retrieve', 'top'):
             return TitleGetSerializer
         return TitleSerializer
 
+    @action(detail=False, methods=('get',), url_path='top')
+    def top(self, request):
+        """
+        Лучшие произведения по рейтингу (by=rating) или взвешенному
+        рейтингу (by=weighted) с фильтрами списка произведений.
+        Читаются первые limit записей индекса рейтинга.
+        """
+        by = request.query_params.get('by', 'rating')
+        if by not in LEADERBOARD_ORDERINGS:
+            raise ValidationError({'by': [LEADERBOARD_BAD_ORDER.format(
+                choices=', '.join(LEADERBOARD_ORDERINGS)
+            )]})
+        try:
+            limit = int(request.query_params.get('limit', LEADERBOARD_SIZE))
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= LEADERBOARD_MAX_SIZE:
+            raise ValidationError({'limit': [
+                BAD_LIMIT.format(limit=LEADERBOARD_MAX_SIZE)
+            ]})
+        field = LEADERBOARD_ORDERINGS[by]
+        titles = self.filter_queryset(self.get_queryset()).filter(
+            **{f'{field}__isnull': False}
+        ).order_by(f'-{field}', '-id')[:limit]
+        return Response(
+            self.get_serializer(titles, many=True).data,
+            status=status.HTTP_200_OK
+        )
+
+    @action(
+        detail=False,
+        methods=('post',),
+        url_path='bulk',
+        permission_classes=(IsAdmin,),
+        parser_classes=(JSONParser, NDJSONParser)
+    )
+    def bulk(self, request):
+        """
+        Пакетное создание произведений из массива JSON или NDJSON.
+
+        Элементы проверяются по отдельности, слаги жанров и категорий
+        всех элементов разрешаются одним запросом, корректные элементы
+        вставляются в одной транзакции. Ответ содержит результат
+        для каждого элемента.
+        """
+        items = request.data
+        if not isinstance(items, list) or not items:
+            raise ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: [BULK_NOT_A_LIST]}
+            )
+        if len(items) > TITLE_BULK_MAX_ITEMS:
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [
+                BULK_TOO_LARGE.format(limit=TITLE_BULK_MAX_ITEMS)
+            ]})
+        context = {**self.get_serializer_context(), 'defer_references': True}
+        serializer = TitleSerializer(context=context)
+        item_serializers = [
+            TitleSerializer(data=item, context=context) for item in items
+        ]
+        errors = [
+            {} if item.is_valid() else item.errors
+            for item in item_serializers
+        ]
+        valid = [
+            index for index, item_errors in enumerate(errors)
+            if not item_errors
+        ]
+        for index, item_errors in zip(valid, serializer.resolve_references([
+            item_serializers[index].validated_data for index in valid
+        ])):
+            errors[index] = item_errors
+        valid = [index for index in valid if not errors[index]]
+        titles = dict(zip(valid, serializer.create_many([
+            item_serializers[index].validated_data for index in valid
+        ])))
+        results = [
+            {'index': index, 'id': titles[index].id} if index in titles
+            else {'index': index, 'errors': item_errors}
+            for index, item_errors in enumerate(errors)
+        ]
+        return Response(
+            {
+                'created': len(titles),
+                'failed': len(items) - len(titles),
+                'results': results
+            },
+            status=(
+                status.HTTP_201_CREATED if titles
+                else status.HTTP_400_BAD_REQUEST
+            )
+        )
+
+    @action(detail=False, methods=('get',), url_path='suggest')
+    def suggest(self, request):
+        """
+        Подсказки названий по началу любого слова без учета регистра,
+        по убыванию рейтинга. Отвечает префиксный индекс в памяти,
+        без запросов к базе, а без общего кэша - запрос к базе.
+        """
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            raise ValidationError({'q': [SUGGEST_EMPTY_QUERY]})
+        try:
+            limit = int(request.query_params.get('limit', SUGGEST_SIZE))
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= SUGGEST_MAX_SIZE:
+            raise ValidationError({'limit': [
+                BAD_LIMIT.format(limit=SUGGEST_MAX_SIZE)
+            ]})
+        return Response(
+            [
+                # Рейтинг округляется так же, как в TitleGetSerializer.
+                {
+                    'id': pk,
+                    'name': name,
+                    'rating': None if rating is None else int(rating)
+                }
+                for pk, name, rating in title_names.suggest(query, limit)
+            ],
+            status=status.HTTP_200_OK
+        )
+
+    @action(
+        detail=True,
+        methods=('get',),
+        url_path='stats'
+    )
+    def stats(self, request, pk=None):
+        """
+        Распределение оценок произведения и статистика по нему.
+        Читается одна строка гистограммы независимо от числа отзывов.
+        """
+        title = get_object_or_404(
+            Title.objects.filter(deleted_at__isnull=True).only('pk'), pk=pk
+        )
+        return Response(
+            ScoreHistogram.get_for_title(title.pk).get_stats(),
+            status=status.HTTP_200_OK
+        )
+
+    def get_change_marker(self):
+        # Названия категорий и жанров входят в ответ, поэтому в ETag
+        # добавляются версии их данных. Версии хранятся в кэше, и без
+        # общего кэша записи других процессов их не меняют.
+        if not SHARED_CACHE:
+            return None
+        versions = (get_version(Category), get_version(Genre))
+        if self.action == 'retrieve':
+            updated_at = Title.objects.filter(
+                id=self.kwargs.get('pk'), deleted_at__isnull=True
+            ).values_list('updated_at', flat=True).first()
+            return None if updated_at is None else (updated_at, versions)
+        # Список отмечается версией произведений из кэша: время изменения
+        # не сдвигается при удалениях, а их подсчет стоил бы полного
+        # прохода по таблице на каждый запрос.
+        return None, (get_version(Title), *versions)
+
 
 class APISignUp(CreateAPIView):
     """View-класс регистрации нового пользователя."""
@@ -143,6 +388,15 @@ class APISignUp(CreateAPIView):
         serializer.is_valid(raise_exception=True)
         username = request.data.get('username')
         email = request.data.get('email')
+        # Помеченный удаленным пользователь не восстанавливается повторной
+        # регистрацией.
+        if User.objects.filter(
+            Q(username=username) | Q(email=email), deleted_at__isnull=False
+        ).exists():
+            return Response(
+                {api_settings.NON_FIELD_ERRORS_KEY: [USER_DELETED]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         try:
             user, create = User.objects.get_or_create(
                 username=username,
@@ -182,13 +436,15 @@ class APIGetToken(CreateAPIView):
         confirmation_code = serializer.validated_data.get(
             'confirmation_code'
         )
-        user = get_object_or_404(User, username=username)
+        user = get_object_or_404(
+            User, username=username, is_active=True, deleted_at__isnull=True
+        )
         if (
             user.confirmation_code != DEFAULT_CONFIRMATION_CODE
             and confirmation_code == user.confirmation_code
         ):
             return Response(
-                {'token': str(RefreshToken.for_user(user).access_token)},
+                {'token': str(get_access_token(user))},
                 status=status.HTTP_200_OK
             )
         user.confirmation_code = DEFAULT_CONFIRMATION_CODE
@@ -199,10 +455,78 @@ class APIGetToken(CreateAPIView):
         )
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class ExportView(APIView):
+    """
+    Потоковая выгрузка таблицы в CSV или NDJSON для администратора.
+    Строки читаются из БД пачками, память не зависит от объема данных.
+    """
+
+    permission_classes = (IsAdmin,)
+
+    def perform_content_negotiation(self, request, force=False):
+        # Формат ответа задается расширением в адресе, а не Accept.
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request, table, output):
+        file_name = f'{table}.csv'
+        if file_name not in EXPORT_FILES or output not in EXPORT_FORMATS:
+            raise NotFound(EXPORT_NOT_FOUND.format(name=f'{table}.{output}'))
+        response = StreamingHttpResponse(
+            export_chunks(file_name, output, EXPORT_CHUNK_SIZE),
+            content_type=EXPORT_CONTENT_TYPES[output]
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{export_name(file_name, output)}"'
+        )
+        return response
+
+
+class ModerationView(APIView):
+    """
+    Пакетное удаление или скрытие отзывов и комментариев модератором.
+
+    Права проверяются один раз на весь пакет. Строки удаляются
+    и скрываются запросами по множеству id, рейтинг пересчитывается
+    один раз для каждого затронутого произведения.
+    """
+
+    permission_classes = (IsAdminOrModerator,)
+
+    def post(self, request):
+        serializer = ModerationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        reviews = Review.objects.filter(pk__in=data['reviews'])
+        comments = Comment.objects.filter(pk__in=data['comments'])
+        with transaction.atomic():
+            title_ids = set(reviews.values_list('title_id', flat=True))
+            if data['action'] == 'hide':
+                review_count = reviews.update(is_hidden=True)
+                comment_count = comments.update(is_hidden=True)
+            else:
+                comment_count = comments.delete()[0]
+                # Комментарии удаляемых отзывов удаляются тем же способом,
+                # а сами отзывы - без сигналов, пересчитывающих рейтинг
+                # на каждую строку.
+                Comment.objects.filter(review__in=reviews).delete()
+                review_count = delete_rows(
+                    Review, reviews.values_list('pk', flat=True)
+                )
+            Title.objects.filter(pk__in=title_ids).recalculate_rating()
+        return Response(
+            {
+                'action': data['action'],
+                'reviews': review_count,
+                'comments': comment_count
+            },
+            status=status.HTTP_200_OK
+        )
+
+
+class UserViewSet(SoftDeleteMixin, viewsets.ModelViewSet):
     """ViewSet для обработки запросов приложения 'users'"""
 
-    queryset = User.objects.all()
+    queryset = User.objects.filter(deleted_at__isnull=True)
     serializer_class = UserAdminSerializer
     permission_classes = (IsAdmin,)
     lookup_field = 'username'
@@ -217,13 +541,15 @@ class UserViewSet(viewsets.ModelViewSet):
         url_path=USER_ENDPOINT_SUFFIX,
     )
     def user_data(self, request):
+        # Пользователь из токена не содержит профиль, загружаем его из БД.
+        user = get_object_or_404(User, pk=request.user.pk)
         if request.method == 'GET':
             return Response(
-                UserAdminSerializer(request.user).data,
+                UserAdminSerializer(user).data,
                 status=status.HTTP_200_OK
             )
         serializer = UserNotAdminSerializer(
-            request.user,
+            user,
             data=request.data,
             partial=True
         )
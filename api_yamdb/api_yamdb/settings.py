@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 from string import ascii_letters, digits
 
@@ -71,6 +72,24 @@ DATABASES = {
 }
 
 
+# Cache
+# Версии кэша списков и индексов в памяти хранятся в кэше. Кэш отдельного
+# процесса не видит записей других процессов, поэтому с ним (SHARED_CACHE
+# ложно) кэш списков и индексы не используются; для них нужен общий
+# бэкенд (Redis, Memcached).
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+SHARED_CACHE = CACHES['default']['BACKEND'] not in LOCAL_CACHE_BACKENDS
+
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -122,9 +141,9 @@ REST_FRAMEWORK = {
     },
     'DEFAULT_PERMISSION_CLASSES': ('rest_framework.permissions.AllowAny', ),
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.StatelessJWTAuthentication',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.LimitOffsetOrCursorPagination',
     'PAGE_SIZE': 10
 }
 
@@ -143,6 +162,19 @@ EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
 
+# Письма отправляются из очереди командой send_emails.
+
+EMAIL_OUTBOX_BATCH_SIZE = 100
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_DELAY = 30
+EMAIL_OUTBOX_POLL_INTERVAL = 5
+
+# Помеченные удаленными объекты удаляются командой purge_deleted.
+
+PURGE_CHUNK_SIZE = 500
+PURGE_SYNC_LIMIT = 100
+PURGE_POLL_INTERVAL = 5
+
 
 # User model
 
@@ -158,6 +190,37 @@ SYMBOLS_CONFIRMATION_CODE = ascii_letters + digits,
 
 DEFAULT_CONFIRMATION_CODE = 'A!1@B#9$Z^'
 
+IMPORT_BATCH_SIZE = 1000
+IMPORT_DATA_PATH = BASE_DIR / 'static/data'
+IMPORT_WORKERS = min(os.cpu_count() or 1, 4)
+EXPORT_CHUNK_SIZE = 2000
+TITLE_BULK_MAX_ITEMS = 1000
+MODERATION_MAX_ITEMS = 1000
+
+# Взвешенный рейтинг: средняя оценка, сглаженная RATING_PRIOR_WEIGHT
+# условными отзывами с оценкой RATING_PRIOR_MEAN.
+RATING_PRIOR_MEAN = 6
+RATING_PRIOR_WEIGHT = 5
+LEADERBOARD_SIZE = 10
+LEADERBOARD_MAX_SIZE = 100
+# Найденные по индексам в памяти id передаются в запрос списком, только
+# если их не больше этого числа (старые сборки SQLite ограничивают
+# число параметров запроса 999), иначе фильтры выполняет SQL.
+TITLE_POSTINGS_MAX_IDS = 900
+# Индексы в памяти процесса (фильтры произведений, подсказки названий)
+# сверяются с версией в кэше, поэтому без общего кэша они выключены
+# и запросы идут в SQL.
+IN_MEMORY_INDEXES = SHARED_CACHE
+SUGGEST_SIZE = 10
+SUGGEST_MAX_SIZE = 50
+# Как часто (в секундах) индекс подсказок подтягивает рейтинги,
+# измененные другими процессами: сдвиги рейтинга не меняют общую версию
+# индекса, чтобы каждый отзыв не вызывал его перестройку.
+SUGGEST_RATING_REFRESH = 30
+
+LIST_CACHE_TIMEOUT = 60 * 60 * 24
+TOKEN_VERSION_CACHE_TIMEOUT = 60
+
 MAX_VALUE_SCORE = 10
 MIN_VALUE_SCORE = 1
 
@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth import get_user_model
 
-from .models import Category, Comment, Genre, Review, Title
+from .models import Category, Comment, Genre, OutgoingEmail, Review, Title
 
 
 User = get_user_model()
@@ -11,5 +11,6 @@ admin.site.register(User)
 admin.site.register(Category)
 admin.site.register(Comment)
 admin.site.register(Genre)
+admin.site.register(OutgoingEmail)
 admin.site.register(Review)
 admin.site.register(Title)
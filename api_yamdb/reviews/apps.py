@@ -1,6 +1,17 @@
 from django.apps import AppConfig
+from django.db import connections
+from django.db.models.signals import post_migrate
+
+
+def install_search(sender, using, **kwargs):
+    from .search import install_title_search
+    install_title_search(connections[using])
 
 
 class ReviewsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'reviews'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        post_migrate.connect(install_search, sender=self)
@@ -0,0 +1,135 @@
+import csv
+import json
+from datetime import datetime
+from itertools import islice
+
+from django.db.models import Case, F, Q, When
+
+from .importer import IMPORT_TABLES, IMPORT_TABLES_BY_FILE
+
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+# Колонки совпадают с файлами import_data, поэтому выгрузку в CSV
+# можно загрузить обратно. Рейтинг произведений при импорте
+# пересчитывается и служит только для аналитики.
+EXPORT_COLUMNS = {
+    'users.csv': (
+        ('id', 'id'),
+        ('username', 'username'),
+        ('email', 'email'),
+        ('role', 'role'),
+        ('bio', 'bio'),
+        ('first_name', 'first_name'),
+        ('last_name', 'last_name'),
+    ),
+    'category.csv': (('id', 'id'), ('name', 'name'), ('slug', 'slug')),
+    'genre.csv': (('id', 'id'), ('name', 'name'), ('slug', 'slug')),
+    'titles.csv': (
+        ('id', 'id'),
+        ('name', 'name'),
+        ('year', 'year'),
+        # Категория, помеченная удаленной, выгружается как пустая.
+        ('category', Case(When(
+            category__deleted_at__isnull=True, then=F('category_id')
+        ))),
+        ('description', 'description'),
+        ('rating', 'rating'),
+    ),
+    'genre_title.csv': (
+        ('id', 'id'), ('title_id', 'title_id'), ('genre_id', 'genre_id')
+    ),
+    'review.csv': (
+        ('id', 'id'),
+        ('title_id', 'title_id'),
+        ('text', 'text'),
+        ('author', 'author_id'),
+        ('score', 'score'),
+        ('pub_date', 'pub_date'),
+    ),
+    'comments.csv': (
+        ('id', 'id'),
+        ('review_id', 'review_id'),
+        ('text', 'text'),
+        ('author', 'author_id'),
+        ('pub_date', 'pub_date'),
+    ),
+}
+# Скрытые модератором отзывы и комментарии, помеченные удаленными
+# объекты и зависящие от них строки не выгружаются.
+EXPORT_FILTERS = {
+    'users.csv': Q(deleted_at__isnull=True),
+    'category.csv': Q(deleted_at__isnull=True),
+    'titles.csv': Q(deleted_at__isnull=True),
+    'genre_title.csv': Q(title__deleted_at__isnull=True),
+    'review.csv': Q(
+        is_hidden=False,
+        title__deleted_at__isnull=True,
+        author__deleted_at__isnull=True
+    ),
+    'comments.csv': Q(
+        is_hidden=False,
+        review__is_hidden=False,
+        review__title__deleted_at__isnull=True,
+        review__author__deleted_at__isnull=True,
+        author__deleted_at__isnull=True
+    ),
+}
+EXPORT_FILES = tuple(table.file_name for table in IMPORT_TABLES)
+LINES_PER_CHUNK = 500
+
+
+class Echo:
+    """Файлоподобный объект, возвращающий записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+def export_name(file_name, output):
+    """Имя файла выгрузки: titles.csv -> titles.ndjson."""
+    return f'{file_name.rsplit(".", 1)[0]}.{output}'
+
+
+def export_rows(file_name, chunk_size):
+    """
+    Строки таблицы в порядке первичного ключа, читаемые курсором
+    пачками по chunk_size без создания объектов моделей.
+    """
+    model = IMPORT_TABLES_BY_FILE[file_name].model
+    return model.objects.filter(
+        EXPORT_FILTERS.get(file_name, Q())
+    ).order_by('pk').values_list(
+        *(field for _, field in EXPORT_COLUMNS[file_name])
+    ).iterator(chunk_size=chunk_size)
+
+
+def format_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def export_lines(file_name, output, chunk_size):
+    """Строки выгрузки таблицы в формате CSV или NDJSON."""
+    header = [column for column, _ in EXPORT_COLUMNS[file_name]]
+    rows = export_rows(file_name, chunk_size)
+    if output == 'csv':
+        writer = csv.writer(Echo())
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(format_value(value) for value in row)
+        return
+    for row in rows:
+        yield json.dumps(
+            dict(zip(header, map(format_value, row))), ensure_ascii=False
+        ) + '\n'
+
+
+def export_chunks(file_name, output, chunk_size):
+    """Выгрузка, склеенная в куски по LINES_PER_CHUNK строк."""
+    lines = export_lines(file_name, output, chunk_size)
+    while True:
+        chunk = ''.join(islice(lines, LINES_PER_CHUNK))
+        if not chunk:
+            return
+        yield chunk
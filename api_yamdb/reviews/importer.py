@@ -0,0 +1,773 @@
+import csv
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import contextmanager
+from hashlib import blake2b, sha256
+from itertools import islice
+
+import django
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import (
+    Category,
+    Comment,
+    Genre,
+    ImportCheckpoint,
+    ImportFingerprint,
+    Review,
+    Title,
+    TitleQuerySet,
+    User
+)
+
+
+MISSING_REFERENCE = (
+    '{file_name}, запись {record}: {field}={value} не найден в {target}'
+)
+TABLE_REPORT = (
+    '{file_name}: прочитано {read}, добавлено {created}, '
+    'обновлено {updated}, пропущено {skipped}, '
+    '{seconds:.2f} с, {rate:.0f} строк/с'
+)
+TABLE_UNCHANGED = '{file_name}: файл не изменился с прошлого импорта'
+INVALID_ID = (
+    '{file_name}, запись {record}: некорректное значение {column}={value}'
+)
+DUPLICATE_ID = '{file_name}, запись {record}: повторяется id={value}'
+DUPLICATE_KEY = (
+    '{file_name}, запись {record}: повторяется значение {columns}={values}'
+)
+EXISTING_KEY = (
+    '{file_name}, запись {record}: значение {columns}={values} уже есть '
+    'в БД у записи id={owner}'
+)
+REJECTED_ROW = '{file_name}, запись {record}: id={value} пропущен проверкой'
+MISSING_COLUMN = '{file_name}: нет колонки {column}'
+CHECK_REPORT = (
+    'Проверка ссылок: {rows} строк, {problems} ошибок, {seconds:.2f} с'
+)
+RATING_CHUNK_SIZE = 500
+# Сколько пачек на процесс разбирается впереди писателя.
+PARSE_AHEAD = 4
+
+
+def parse_int(value):
+    return int(value) if value not in (None, '') else None
+
+
+def parse_user(row):
+    return {
+        'id': int(row['id']),
+        'username': row['username'],
+        'email': row['email'],
+        'role': row['role'],
+        'bio': row.get('bio') or '',
+        'first_name': row.get('first_name') or '',
+        'last_name': row.get('last_name') or '',
+    }
+
+
+def parse_description(row):
+    return {'id': int(row['id']), 'name': row['name'], 'slug': row['slug']}
+
+
+def parse_title(row):
+    return {
+        'id': int(row['id']),
+        'name': row['name'],
+        'year': int(row['year']),
+        'description': row.get('description') or '',
+        'category_id': parse_int(row.get('category')),
+    }
+
+
+def parse_genre_title(row):
+    return {
+        'id': int(row['id']),
+        'title_id': int(row['title_id']),
+        'genre_id': int(row['genre_id']),
+    }
+
+
+def parse_review(row):
+    return {
+        'id': int(row['id']),
+        'title_id': int(row['title_id']),
+        'text': row['text'],
+        'author_id': int(row['author']),
+        'score': int(row['score']),
+        'pub_date': parse_datetime(row['pub_date']),
+    }
+
+
+def parse_comment(row):
+    return {
+        'id': int(row['id']),
+        'review_id': int(row['review_id']),
+        'text': row['text'],
+        'author_id': int(row['author']),
+        'pub_date': parse_datetime(row['pub_date']),
+    }
+
+
+class ImportTable:
+    """
+    Описание импортируемого CSV-файла: модель, разбор строки, ссылки
+    на другие файлы в виде {поле: (колонка, файл, допускается ли NULL)}
+    и наборы колонок, значения которых не должны повторяться.
+    """
+
+    def __init__(self, file_name, model, parse, references=None, unique=()):
+        self.file_name = file_name
+        self.model = model
+        self.parse = parse
+        self.references = references or {}
+        self.unique = unique
+
+
+# Файлы перечислены в порядке зависимостей по внешним ключам.
+IMPORT_TABLES = (
+    ImportTable(
+        'users.csv', User, parse_user,
+        unique=(('username',), ('email',))
+    ),
+    ImportTable(
+        'category.csv', Category, parse_description, unique=(('slug',),)
+    ),
+    ImportTable(
+        'genre.csv', Genre, parse_description, unique=(('slug',),)
+    ),
+    ImportTable(
+        'titles.csv', Title, parse_title,
+        {'category_id': ('category', 'category.csv', True)}
+    ),
+    ImportTable(
+        'genre_title.csv', Title.genre.through, parse_genre_title,
+        {
+            'title_id': ('title_id', 'titles.csv', False),
+            'genre_id': ('genre_id', 'genre.csv', False)
+        },
+        unique=(('title_id', 'genre_id'),)
+    ),
+    ImportTable(
+        'review.csv', Review, parse_review,
+        {
+            'title_id': ('title_id', 'titles.csv', False),
+            'author_id': ('author', 'users.csv', False)
+        },
+        unique=(('title_id', 'author'),)
+    ),
+    ImportTable(
+        'comments.csv', Comment, parse_comment,
+        {
+            'review_id': ('review_id', 'review.csv', False),
+            'author_id': ('author', 'users.csv', False)
+        }
+    ),
+)
+
+IMPORT_TABLES_BY_FILE = {table.file_name: table for table in IMPORT_TABLES}
+
+
+def parse_batch(file_name, header, rows):
+    """
+    Разбирает пачку строк CSV в значения полей модели и отпечатки строк.
+    Выполняется в процессах пула, поэтому не обращается к БД.
+    """
+    parse = IMPORT_TABLES_BY_FILE[file_name].parse
+    parsed = []
+    for row in rows:
+        row = dict(zip(header, row))
+        parsed.append((parse(row), row_fingerprint(row)))
+    return parsed
+
+
+class SerialExecutor:
+    """Замена пула процессов, выполняющая разбор в текущем процессе."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def submit(self, function, *args):
+        future = Future()
+        future.set_result(function(*args))
+        return future
+
+
+@contextmanager
+def keep_auto_dates(model):
+    """Отключает auto_now_add, чтобы сохранить даты из CSV."""
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def read_batches(reader, batch_size):
+    while True:
+        batch = list(islice(reader, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def row_fingerprint(row):
+    """64-битный отпечаток содержимого строки CSV."""
+    return int.from_bytes(
+        blake2b(
+            '\x1f'.join(row.values()).encode('utf-8'), digest_size=8
+        ).digest(),
+        'big',
+        signed=True
+    )
+
+
+def file_digest(path):
+    digest = sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class IdSet:
+    """
+    Компактное множество неотрицательных целых id на битовой карте:
+    бит на каждое значение до наибольшего id. Значения вне карты
+    (отрицательные и слишком большие) хранятся в обычном множестве.
+    """
+
+    BITMAP_LIMIT = 1 << 30
+
+    def __init__(self, values=()):
+        self.bits = bytearray()
+        self.overflow = set()
+        self.size = 0
+        for value in values:
+            self.add(value)
+
+    def add(self, value):
+        """Добавляет id; возвращает False, если он уже был в множестве."""
+        if not 0 <= value < self.BITMAP_LIMIT:
+            if value in self.overflow:
+                return False
+            self.overflow.add(value)
+            self.size += 1
+            return True
+        index, bit = value >> 3, 1 << (value & 7)
+        if index >= len(self.bits):
+            self.bits.extend(bytes(max(index + 1, 2 * len(self.bits))
+                                   - len(self.bits)))
+        if self.bits[index] & bit:
+            return False
+        self.bits[index] |= bit
+        self.size += 1
+        return True
+
+    def __contains__(self, value):
+        if not 0 <= value < self.BITMAP_LIMIT:
+            return value in self.overflow
+        index = value >> 3
+        return index < len(self.bits) and bool(
+            self.bits[index] & (1 << (value & 7))
+        )
+
+    def __len__(self):
+        return self.size
+
+
+def key_hash(values):
+    """64-битный хэш значений уникального ключа."""
+    return int.from_bytes(
+        blake2b('\x1f'.join(values).encode('utf-8'), digest_size=8).digest(),
+        'big'
+    )
+
+
+def checkpoint_source(path, table):
+    return str((path / table.file_name).resolve())
+
+
+def read_checkpoints(path, incremental):
+    """
+    Дайджесты файлов и имена файлов, не изменившихся с прошлого
+    импорта; последние ищутся только в инкрементальном режиме.
+    """
+    digests, unchanged = {}, set()
+    for table in IMPORT_TABLES:
+        digest = file_digest(path / table.file_name)
+        digests[table.file_name] = digest
+        if incremental and ImportCheckpoint.objects.filter(
+            source=checkpoint_source(path, table), digest=digest
+        ).exists():
+            unchanged.add(table.file_name)
+    return digests, unchanged
+
+
+class ImportValidator:
+    """
+    Проверка ссылочной целостности CSV-файлов до первой записи в БД.
+
+    Все файлы читаются один раз в порядке зависимостей; из строк
+    разбираются только id, ссылки и уникальные колонки. Известные id
+    каждого файла вместе с уже имеющимися в БД хранятся в IdSet,
+    значения уникальных ключей файла и БД - в виде 64-битных хэшей.
+    Возвращается список всех висячих ссылок и повторяющихся ключей;
+    id строк с повторяющимися ключами собираются в rejected, чтобы
+    импорт с --skip-invalid их пропустил.
+
+    В инкрементальном режиме файлы, не изменившиеся с прошлого импорта,
+    не читаются: их строки уже в БД, и известными считаются id из БД.
+    Дайджесты файлов (digests, unchanged) передаются загрузчику.
+    """
+
+    def __init__(self, path, stdout, incremental=False):
+        self.path = path
+        self.stdout = stdout
+        self.incremental = incremental
+        self.digests = {}
+        self.unchanged = set()
+        self.known_ids = {}
+        self.rejected = {}
+        self.problems = []
+        self.rows = 0
+
+    def run(self):
+        started = time.monotonic()
+        self.digests, self.unchanged = read_checkpoints(
+            self.path, self.incremental
+        )
+        for table in IMPORT_TABLES:
+            self.check_table(table)
+        self.stdout.write(CHECK_REPORT.format(
+            rows=self.rows,
+            problems=len(self.problems),
+            seconds=time.monotonic() - started
+        ))
+        return self.problems
+
+    def report(self, message, **kwargs):
+        problem = message.format(**kwargs)
+        self.problems.append(problem)
+        self.stdout.write(problem)
+
+    def check_table(self, table):
+        file_name = table.file_name
+        known = IdSet(
+            table.model.objects.values_list('pk', flat=True).iterator()
+        )
+        self.known_ids[file_name] = known
+        if file_name in self.unchanged:
+            return
+        with open(
+            self.path / file_name, newline='', encoding='utf-8'
+        ) as csvfile:
+            reader = filter(None, csv.reader(csvfile))
+            header = {column: index for index, column in enumerate(
+                next(reader, [])
+            )}
+            columns = {'id'}.union(
+                column for column, _, _ in table.references.values()
+            ).union(*table.unique)
+            missing = sorted(columns - header.keys())
+            for column in missing:
+                self.report(MISSING_COLUMN, file_name=file_name, column=column)
+            if missing:
+                return
+            id_index = header['id']
+            references = [
+                (column, header[column], target, nullable)
+                for column, target, nullable in table.references.values()
+            ]
+            unique = [
+                (
+                    columns,
+                    [header[column] for column in columns],
+                    set(),
+                    self.load_keys(table, columns)
+                )
+                for columns in table.unique
+            ]
+            self.rejected[file_name] = IdSet()
+            file_ids = IdSet()
+            for record, row in enumerate(reader, 1):
+                self.rows += 1
+                self.check_row(
+                    file_name, record, row, id_index, file_ids, known,
+                    references, unique
+                )
+
+    def check_row(self, file_name, record, row, id_index, file_ids, known,
+                  references, unique):
+        row_id = self.parse_id(file_name, record, row, id_index, 'id')
+        if row_id is not None:
+            if not file_ids.add(row_id):
+                self.report(
+                    DUPLICATE_ID,
+                    file_name=file_name, record=record, value=row_id
+                )
+            known.add(row_id)
+        for column, index, target, nullable in references:
+            if nullable and self.get_value(row, index) == '':
+                continue
+            reference = self.parse_id(file_name, record, row, index, column)
+            if reference is not None and (
+                reference not in self.known_ids[target]
+            ):
+                self.report(
+                    MISSING_REFERENCE,
+                    file_name=file_name, record=record, field=column,
+                    value=reference, target=target
+                )
+        for columns, indexes, hashes, stored in unique:
+            values = [self.get_value(row, index) for index in indexes]
+            digest = key_hash(values)
+            owner = stored.get(digest)
+            if digest in hashes:
+                self.report(
+                    DUPLICATE_KEY,
+                    file_name=file_name, record=record,
+                    columns=','.join(columns), values=','.join(values)
+                )
+            elif owner is not None and owner != row_id:
+                self.report(
+                    EXISTING_KEY,
+                    file_name=file_name, record=record,
+                    columns=','.join(columns), values=','.join(values),
+                    owner=owner
+                )
+            else:
+                hashes.add(digest)
+                continue
+            if row_id is not None:
+                self.rejected[file_name].add(row_id)
+
+    @staticmethod
+    def load_keys(table, columns):
+        """
+        Хэши значений уникального ключа строк, уже имеющихся в БД,
+        с id их владельцев. Колонки CSV переводятся в поля модели
+        по описанию ссылок таблицы (author -> author_id).
+        """
+        fields = {
+            column: field
+            for field, (column, _, _) in table.references.items()
+        }
+        return {
+            key_hash([str(value) for value in values]): pk
+            for pk, *values in table.model.objects.values_list(
+                'pk', *(fields.get(column, column) for column in columns)
+            ).iterator()
+        }
+
+    @staticmethod
+    def get_value(row, index):
+        return row[index] if index < len(row) else ''
+
+    def parse_id(self, file_name, record, row, index, column):
+        value = self.get_value(row, index)
+        try:
+            return int(value)
+        except ValueError:
+            self.report(
+                INVALID_ID,
+                file_name=file_name, record=record, column=column,
+                value=value
+            )
+            return None
+
+
+class CsvImporter:
+    """
+    Потоковый загрузчик CSV-файлов в БД.
+
+    Файлы читаются пачками, которые разбираются в пуле процессов
+    (числа, даты, отпечатки строк). Разобранные пачки принимает
+    единственный писатель в порядке зависимостей: внешние ключи
+    проверяются по множествам известных id, строки вставляются
+    bulk_create в отдельной транзакции на пачку. В памяти держатся
+    только id и несколько пачек на процесс.
+
+    Для каждой строки сохраняется отпечаток, для файла - контрольная
+    сумма. В инкрементальном режиме неизменившиеся файлы пропускаются
+    целиком, а из остальных записываются только новые и изменившиеся
+    строки; без него существующие строки не трогаются.
+    """
+
+    def __init__(self, path, batch_size, stdout, incremental=False,
+                 workers=1, rejected=None, checkpoints=None):
+        self.path = path
+        self.rejected = rejected or {}
+        self.checkpoints = checkpoints
+        self.batch_size = batch_size
+        self.stdout = stdout
+        self.incremental = incremental
+        self.workers = workers
+        self.known_ids = {}
+        self.digests = {}
+        self.unchanged = set()
+        self.table = None
+        self.rated_title_ids = set()
+        self.genre_title_ids = set()
+        self.revoked_user_ids = set()
+
+    def run(self):
+        # Дайджесты, уже посчитанные проверкой, не пересчитываются.
+        self.digests, self.unchanged = self.checkpoints or read_checkpoints(
+            self.path, self.incremental
+        )
+        with self.get_executor() as executor:
+            for table, batch in self.parse_tables(executor):
+                if batch is None:
+                    self.start_table(table)
+                else:
+                    self.import_batch(table, batch)
+            self.finish_table()
+        # bulk_create и bulk_update не вызывают сигналы отзывов и жанров.
+        for title_ids, update in (
+            (self.rated_title_ids, TitleQuerySet.recalculate_rating),
+            (self.genre_title_ids - self.rated_title_ids, TitleQuerySet.touch)
+        ):
+            title_ids = sorted(title_ids)
+            for start in range(0, len(title_ids), RATING_CHUNK_SIZE):
+                update(Title.objects.filter(
+                    pk__in=title_ids[start:start + RATING_CHUNK_SIZE]
+                ))
+
+    def get_executor(self):
+        if self.workers <= 1:
+            return SerialExecutor()
+        return ProcessPoolExecutor(self.workers, initializer=django.setup)
+
+    def parse_tables(self, executor):
+        """
+        Читает файлы в порядке зависимостей и отдает пачки строк
+        на разбор в пул. Возвращает пары (таблица, разобранная пачка)
+        в исходном порядке; начало каждой таблицы отмечается парой
+        (таблица, None).
+        """
+        pending = deque()
+        window = max(self.workers, 1) * PARSE_AHEAD
+        for table in IMPORT_TABLES:
+            pending.append((table, None))
+            if table.file_name in self.unchanged:
+                continue
+            with open(
+                self.path / table.file_name, newline='', encoding='utf-8'
+            ) as csvfile:
+                # Как и csv.DictReader, пропускаем пустые строки.
+                reader = filter(None, csv.reader(csvfile))
+                header = next(reader, [])
+                for rows in read_batches(reader, self.batch_size):
+                    pending.append((table, executor.submit(
+                        parse_batch, table.file_name, header, rows
+                    )))
+                    while len(pending) > window:
+                        yield self.get_parsed(*pending.popleft())
+        while pending:
+            yield self.get_parsed(*pending.popleft())
+
+    @staticmethod
+    def get_parsed(table, future):
+        return table, future.result() if future is not None else None
+
+    def start_table(self, table):
+        """Завершает предыдущую таблицу и готовит запись следующей."""
+        self.finish_table()
+        self.known_ids[table.file_name] = IdSet(
+            table.model.objects.values_list('pk', flat=True).iterator()
+        )
+        if table.file_name in self.unchanged:
+            self.stdout.write(TABLE_UNCHANGED.format(
+                file_name=table.file_name
+            ))
+            return
+        self.table = table
+        self.read = self.created = self.updated = self.skipped = 0
+        self.started = time.monotonic()
+
+    def finish_table(self):
+        table = self.table
+        if table is None:
+            return
+        self.table = None
+        ImportCheckpoint.objects.update_or_create(
+            source=checkpoint_source(self.path, table),
+            defaults={'digest': self.digests[table.file_name],
+                      'rows': self.read}
+        )
+        seconds = time.monotonic() - self.started
+        self.stdout.write(TABLE_REPORT.format(
+            file_name=table.file_name,
+            read=self.read,
+            created=self.created,
+            updated=self.updated,
+            skipped=self.skipped,
+            seconds=seconds,
+            rate=self.read / seconds if seconds else 0
+        ))
+
+    def import_batch(self, table, batch):
+        model = table.model
+        known = self.known_ids[table.file_name]
+        rows = []
+        for values, fingerprint in batch:
+            self.read += 1
+            rows.append((values, fingerprint, self.read))
+        stored = self.get_fingerprints(
+            table, [values['id'] for values, _, _ in rows]
+        )
+        created, updated, fingerprints = [], [], []
+        rejected = self.rejected.get(table.file_name, ())
+        for values, fingerprint, record in rows:
+            row_id = values['id']
+            if row_id in rejected:
+                self.stdout.write(REJECTED_ROW.format(
+                    file_name=table.file_name, record=record, value=row_id
+                ))
+                self.skipped += 1
+                continue
+            exists = row_id in known
+            stored_fingerprint = stored.get(row_id)
+            if exists and (not self.incremental or (
+                stored_fingerprint is not None
+                and stored_fingerprint.fingerprint == fingerprint
+            )):
+                self.skipped += 1
+                continue
+            if not self.resolve(table, values, record):
+                self.skipped += 1
+                continue
+            if exists:
+                updated.append(values)
+            else:
+                known.add(row_id)
+                created.append(model(**values))
+            if stored_fingerprint is None:
+                stored_fingerprint = ImportFingerprint(
+                    file_name=table.file_name, row_id=row_id
+                )
+            stored_fingerprint.fingerprint = fingerprint
+            fingerprints.append(stored_fingerprint)
+        with transaction.atomic(), keep_auto_dates(model):
+            model.objects.bulk_create(created)
+            self.update_rows(model, updated)
+            ImportFingerprint.objects.bulk_create(
+                fingerprint for fingerprint in fingerprints
+                if fingerprint.pk is None
+            )
+            ImportFingerprint.objects.bulk_update(
+                [
+                    fingerprint for fingerprint in fingerprints
+                    if fingerprint.pk is not None
+                ],
+                ('fingerprint',)
+            )
+        title_ids = self.get_title_ids(model)
+        if title_ids is not None:
+            title_ids.update(obj.title_id for obj in created)
+        self.created += len(created)
+        self.updated += len(updated)
+
+    def get_title_ids(self, model):
+        """Множество произведений, затронутых строками модели."""
+        if model is Review:
+            return self.rated_title_ids
+        if model is Title.genre.through:
+            return self.genre_title_ids
+        return None
+
+    def get_fingerprints(self, table, ids):
+        """
+        Загружает сохраненные отпечатки строк пачки одним запросом
+        по диапазону id.
+        """
+        if not ids:
+            return {}
+        ids = set(ids)
+        return {
+            fingerprint.row_id: fingerprint
+            for fingerprint in ImportFingerprint.objects.filter(
+                file_name=table.file_name,
+                row_id__gte=min(ids),
+                row_id__lte=max(ids)
+            )
+            if fingerprint.row_id in ids
+        }
+
+    def update_rows(self, model, updated):
+        """
+        Обновляет изменившиеся строки одним bulk_update и учитывает
+        побочные эффекты, которые обычно выполняют сигналы и save().
+        """
+        if not updated:
+            return
+        ids = [values['id'] for values in updated]
+        title_ids = self.get_title_ids(model)
+        if title_ids is not None:
+            title_ids.update(model.objects.filter(pk__in=ids).values_list(
+                'title_id', flat=True
+            ))
+            title_ids.update(values['title_id'] for values in updated)
+        revoked = set()
+        if model is User:
+            roles = dict(
+                User.objects.filter(pk__in=ids).values_list('pk', 'role')
+            )
+            revoked = {
+                values['id'] for values in updated
+                if roles.get(values['id']) != values['role']
+            }
+        auto_now = [
+            field.name for field in model._meta.concrete_fields
+            if getattr(field, 'auto_now', False)
+        ]
+        now = timezone.now()
+        objects = []
+        for values in updated:
+            obj = model(**values)
+            for name in auto_now:
+                setattr(obj, name, now)
+            objects.append(obj)
+        fields = [name for name in updated[0] if name != 'id'] + auto_now
+        model.objects.bulk_update(objects, fields)
+        if revoked:
+            User.objects.filter(pk__in=revoked).update(
+                token_version=F('token_version') + 1
+            )
+            self.revoked_user_ids.update(revoked)
+
+    def resolve(self, table, values, record):
+        """
+        Проверяет внешние ключи строки. Неизвестная необязательная
+        ссылка обнуляется, неизвестная обязательная - строка пропускается.
+        """
+        for field, (_, target, nullable) in table.references.items():
+            value = values[field]
+            if value is None or value in self.known_ids[target]:
+                continue
+            self.stdout.write(MISSING_REFERENCE.format(
+                file_name=table.file_name,
+                record=record,
+                field=field,
+                value=value,
+                target=target
+            ))
+            if not nullable:
+                return False
+            values[field] = None
+        return True
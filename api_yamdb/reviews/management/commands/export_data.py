@@ -0,0 +1,51 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from api_yamdb.settings import EXPORT_CHUNK_SIZE
+from reviews.exporter import (
+    EXPORT_FILES,
+    EXPORT_FORMATS,
+    export_chunks,
+    export_name
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает пользователей, категории, жанры, произведения '
+        'с рейтингами, отзывы и комментарии в файлы CSV или NDJSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            type=Path,
+            required=True,
+            help='Папка для файлов выгрузки.'
+        )
+        parser.add_argument(
+            '--format',
+            choices=EXPORT_FORMATS,
+            default='csv',
+            help='Формат файлов; CSV можно загрузить обратно import_data.'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=EXPORT_CHUNK_SIZE,
+            help='Количество строк, читаемых из БД за раз.'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        path.mkdir(parents=True, exist_ok=True)
+        for file_name in EXPORT_FILES:
+            name = export_name(file_name, options['format'])
+            with open(path / name, 'w', newline='', encoding='utf-8') as file:
+                for chunk in export_chunks(
+                    file_name, options['format'], options['chunk_size']
+                ):
+                    file.write(chunk)
+            self.stdout.write(f'{name}: выгружен')
+        self.stdout.write(self.style.SUCCESS('Выгрузка завершена.'))
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api_yamdb.settings import PURGE_CHUNK_SIZE, PURGE_POLL_INTERVAL
+from reviews.purge import purge_deleted
+
+
+PURGE_RESULT = 'Удалено помеченных объектов: {purged}.'
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет помеченные удаленными произведения, категории '
+        'и пользователей вместе с зависимыми строками небольшими '
+        'пачками, не блокируя надолго запись в БД.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Удалить все помеченные объекты и завершить работу.'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=PURGE_CHUNK_SIZE,
+            help='Количество строк, удаляемых в одной транзакции.'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=PURGE_POLL_INTERVAL,
+            help='Пауза в секундах между проверками.'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            purged = purge_deleted(options['chunk_size'])
+            if purged:
+                self.stdout.write(PURGE_RESULT.format(purged=purged))
+            if options['once']:
+                return
+            time.sleep(options['interval'])
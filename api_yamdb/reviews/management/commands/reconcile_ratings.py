@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce
+
+from reviews.models import Title
+
+
+DRIFT = (
+    'Произведение id={id}: сохранено {score_sum}/{review_count}, '
+    'по отзывам {actual_sum}/{actual_count}'
+)
+SUMMARY = 'Расхождений найдено: {drift}. Произведений пересчитано: {fixed}.'
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверяет сохраненные суммы оценок и число отзывов произведений '
+        'с таблицей отзывов и пересчитывает рейтинг одним запросом.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать расхождения, не исправляя их.'
+        )
+
+    def handle(self, *args, **options):
+        visible = Q(
+            reviews__is_hidden=False,
+            reviews__author__deleted_at__isnull=True
+        )
+        drifted = Title.objects.annotate(
+            actual_sum=Coalesce(Sum('reviews__score', filter=visible), 0),
+            actual_count=Count('reviews', filter=visible),
+        ).filter(
+            ~Q(score_sum=F('actual_sum'))
+            | ~Q(review_count=F('actual_count'))
+        ).values(
+            'id', 'score_sum', 'review_count', 'actual_sum', 'actual_count'
+        ).order_by('id')
+        drift = 0
+        for row in drifted.iterator():
+            drift += 1
+            self.stdout.write(DRIFT.format(**row))
+        fixed = 0
+        if not options['dry_run']:
+            with transaction.atomic():
+                fixed = Title.objects.all().recalculate_rating()
+        self.stdout.write(
+            self.style.SUCCESS(SUMMARY.format(drift=drift, fixed=fixed))
+        )
@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api_yamdb.settings import (
+    EMAIL_OUTBOX_BATCH_SIZE,
+    EMAIL_OUTBOX_POLL_INTERVAL
+)
+from reviews.outbox import deliver_outbox
+
+
+BATCH_RESULT = 'Отправлено писем: {sent}, ошибок: {failed}.'
+
+
+class Command(BaseCommand):
+    help = (
+        'Отправляет письма из очереди пачками через одно соединение '
+        'почтового бэкенда.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Отправить все готовые письма и завершить работу.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=EMAIL_OUTBOX_BATCH_SIZE,
+            help='Количество писем в пачке.'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=EMAIL_OUTBOX_POLL_INTERVAL,
+            help='Пауза в секундах между проверками пустой очереди.'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = deliver_outbox(options['batch_size'])
+            if sent or failed:
+                self.stdout.write(BATCH_RESULT.format(
+                    sent=sent, failed=failed
+                ))
+            if sent + failed < options['batch_size']:
+                if options['once']:
+                    return
+                time.sleep(options['interval'])
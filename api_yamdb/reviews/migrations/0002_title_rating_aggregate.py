@@ -0,0 +1,47 @@
+# Generated by Django 3.2 on 2026-10-18 18:11
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, Sum
+
+
+def fill_rating_aggregate(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    titles = Title.objects.annotate(
+        actual_sum=Sum('reviews__score'),
+        actual_count=Count('reviews'),
+        actual_rating=Avg('reviews__score'),
+    ).filter(actual_count__gt=0)
+    for title in titles.iterator():
+        Title.objects.filter(pk=title.pk).update(
+            score_sum=title.actual_sum,
+            review_count=title.actual_count,
+            rating=title.actual_rating,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='rating',
+            field=models.FloatField(editable=False, null=True, verbose_name='Рейтинг'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество отзывов'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_sum',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Сумма оценок'),
+        ),
+        migrations.RunPython(
+            fill_rating_aggregate, migrations.RunPython.noop
+        ),
+    ]
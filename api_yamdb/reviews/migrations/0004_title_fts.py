@@ -0,0 +1,71 @@
+from django.db import migrations
+from django.db.utils import OperationalError
+
+# DDL индекса на момент миграции. Триггеры, потерянные при пересоздании
+# таблицы последующими миграциями, восстанавливает обработчик post_migrate
+# приложения reviews по актуальному описанию в reviews.search.
+TITLE_FTS_CREATE = (
+    'CREATE VIRTUAL TABLE IF NOT EXISTS reviews_title_fts USING fts5('
+    "name, description, content='reviews_title', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')"
+)
+TITLE_FTS_TRIGGERS = {
+    'reviews_title_fts_ai': (
+        'AFTER INSERT ON reviews_title BEGIN '
+        'INSERT INTO reviews_title_fts(rowid, name, description) '
+        'VALUES (new.id, new.name, new.description); END'
+    ),
+    'reviews_title_fts_ad': (
+        'AFTER DELETE ON reviews_title BEGIN '
+        'INSERT INTO reviews_title_fts'
+        '(reviews_title_fts, rowid, name, description) '
+        "VALUES ('delete', old.id, old.name, old.description); END"
+    ),
+    'reviews_title_fts_au': (
+        'AFTER UPDATE OF name, description ON reviews_title BEGIN '
+        'INSERT INTO reviews_title_fts'
+        '(reviews_title_fts, rowid, name, description) '
+        "VALUES ('delete', old.id, old.name, old.description); "
+        'INSERT INTO reviews_title_fts(rowid, name, description) '
+        'VALUES (new.id, new.name, new.description); END'
+    ),
+}
+
+
+def create_title_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        try:
+            cursor.execute(TITLE_FTS_CREATE)
+        except OperationalError:
+            # SQLite собран без FTS5: поиск работает подстрокой.
+            return
+        for name, definition in TITLE_FTS_TRIGGERS.items():
+            cursor.execute(
+                f'CREATE TRIGGER IF NOT EXISTS {name} {definition}'
+            )
+        cursor.execute(
+            "INSERT INTO reviews_title_fts(reviews_title_fts) "
+            "VALUES ('rebuild')"
+        )
+
+
+def drop_title_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for name in TITLE_FTS_TRIGGERS:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+        cursor.execute('DROP TABLE IF EXISTS reviews_title_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0003_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_title_fts, drop_title_fts),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 3.2 on 2026-10-18 18:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_outgoing_email'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=256, unique=True, verbose_name='Файл')),
+                ('digest', models.CharField(max_length=64, verbose_name='Контрольная сумма')),
+                ('rows', models.PositiveIntegerField(verbose_name='Строк')),
+                ('imported_at', models.DateTimeField(auto_now=True, verbose_name='Дата импорта')),
+            ],
+            options={
+                'verbose_name': 'Отметка импорта',
+                'verbose_name_plural': 'Отметки импорта',
+                'ordering': ('source',),
+            },
+        ),
+        migrations.CreateModel(
+            name='ImportFingerprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_name', models.CharField(max_length=50, verbose_name='Файл')),
+                ('row_id', models.BigIntegerField(verbose_name='id строки')),
+                ('fingerprint', models.BigIntegerField(verbose_name='Отпечаток')),
+            ],
+            options={
+                'verbose_name': 'Отпечаток строки импорта',
+                'verbose_name_plural': 'Отпечатки строк импорта',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='importfingerprint',
+            constraint=models.UniqueConstraint(fields=('file_name', 'row_id'), name='unique_import_fingerprint'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2 on 2026-10-18 18:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_import_checkpoints'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='is_hidden',
+            field=models.BooleanField(default=False, verbose_name='Скрыт модератором'),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='is_hidden',
+            field=models.BooleanField(default=False, verbose_name='Скрыт модератором'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.2 on 2026-10-18 18:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_discussion_is_hidden'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True, verbose_name='Дата удаления'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True, verbose_name='Дата удаления'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True, verbose_name='Дата удаления'),
+        ),
+    ]
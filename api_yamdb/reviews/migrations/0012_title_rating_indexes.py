@@ -0,0 +1,83 @@
+# Generated by Django 3.2 on 2026-10-18 18:54
+
+from django.db import migrations, models
+from django.db.models import ExpressionWrapper, F, FloatField, Value
+from django.db.models.functions import Cast, NullIf
+
+# Значения RATING_PRIOR_MEAN и RATING_PRIOR_WEIGHT на момент миграции:
+# ее результат не должен зависеть от последующих настроек.
+RATING_PRIOR_MEAN = 6
+RATING_PRIOR_WEIGHT = 5
+
+
+def fill_weighted_rating(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Title.objects.update(weighted_rating=ExpressionWrapper(
+        (
+            Cast(F('score_sum'), FloatField())
+            + Value(float(RATING_PRIOR_WEIGHT * RATING_PRIOR_MEAN))
+        ) / (F('review_count') + Value(RATING_PRIOR_WEIGHT))
+        * (F('review_count') / NullIf(F('review_count'), Value(0))),
+        output_field=FloatField()
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0011_score_histogram'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='weighted_rating',
+            field=models.FloatField(editable=False, null=True, verbose_name='Взвешенный рейтинг'),
+        ),
+        migrations.RunPython(
+            fill_weighted_rating, migrations.RunPython.noop
+        ),
+        migrations.AlterField(
+            model_name='category',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Дата удаления'),
+        ),
+        migrations.AlterField(
+            model_name='title',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Дата удаления'),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Дата удаления'),
+        ),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(condition=models.Q(deleted_at__isnull=False), fields=['deleted_at'], name='category_deleted_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(condition=models.Q(deleted_at__isnull=False), fields=['deleted_at'], name='title_deleted_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(condition=models.Q(deleted_at__isnull=True), fields=['rating', 'id'], name='title_rating_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(condition=models.Q(deleted_at__isnull=True), fields=['weighted_rating', 'id'], name='title_weighted_rating_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(condition=models.Q(deleted_at__isnull=True), fields=['category', 'rating', 'id'], name='title_category_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(condition=models.Q(deleted_at__isnull=True), fields=['category', 'weighted_rating', 'id'], name='title_category_weighted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(deleted_at__isnull=False), fields=['deleted_at'], name='user_deleted_at_idx'),
+        ),
+    ]
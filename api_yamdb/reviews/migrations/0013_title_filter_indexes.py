@@ -0,0 +1,27 @@
+# Generated by Django 3.2 on 2026-10-18 18:57
+
+from django.db import migrations, models
+
+
+# Связи произведений с жанрами создаются Django без модели, поэтому
+# покрывающий индекс для отбора произведений по жанрам создается SQL.
+GENRE_TITLE_INDEX = 'title_genre_genre_title_idx'
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0012_title_rating_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(condition=models.Q(deleted_at__isnull=True), fields=['year', 'id'], name='title_year_id_idx'),
+        ),
+        migrations.RunSQL(
+            f'CREATE INDEX {GENRE_TITLE_INDEX} '
+            'ON reviews_title_genre (genre_id, title_id)',
+            f'DROP INDEX {GENRE_TITLE_INDEX}'
+        ),
+    ]
@@ -2,7 +2,14 @@ import datetime
 
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import (
+    Count, ExpressionWrapper, F, FloatField, OuterRef, Q, Subquery, Sum,
+    Value
+)
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.dispatch import Signal
+from django.utils import timezone
 
 from .validators import validate_username
 from api_yamdb.settings import (
@@ -14,7 +21,9 @@ from api_yamdb.settings import (
     MAX_LENGTH_LASTNAME,
     MAX_LENGTH_NAME,
     MAX_LENGTH_SLUG,
-    MIN_VALUE_SCORE
+    MIN_VALUE_SCORE,
+    RATING_PRIOR_MEAN,
+    RATING_PRIOR_WEIGHT
 )
 
 
@@ -22,6 +31,31 @@ def current_year():
     return datetime.date.today().year
 
 
+def average_score(score_sum, review_count):
+    """Выражение средней оценки; NULL для произведения без отзывов."""
+    return ExpressionWrapper(
+        Cast(score_sum, FloatField()) / NullIf(review_count, Value(0)),
+        output_field=FloatField()
+    )
+
+
+def weighted_score(score_sum, review_count):
+    """
+    Выражение байесовской оценки: средняя оценка с добавленными
+    RATING_PRIOR_WEIGHT отзывами с оценкой RATING_PRIOR_MEAN.
+    NULL для произведения без отзывов.
+    """
+    return ExpressionWrapper(
+        (
+            Cast(score_sum, FloatField())
+            + Value(float(RATING_PRIOR_WEIGHT * RATING_PRIOR_MEAN))
+        ) / (review_count + Value(RATING_PRIOR_WEIGHT))
+        # Целочисленное n / n равно 1 и NULL при n = 0.
+        * (review_count / NullIf(review_count, Value(0))),
+        output_field=FloatField()
+    )
+
+
 class UserRoles(models.TextChoices):
     """Enum-класс ролей пользователей."""
 
@@ -30,7 +64,45 @@ class UserRoles(models.TextChoices):
     ADMIN = 'admin'
 
 
-class User(AbstractUser):
+def deleted_index(name):
+    """
+    Частичный индекс только помеченных удаленными строк для
+    purge_deleted. Полный индекс по deleted_at планировщик выбирал бы
+    для условия deleted_at IS NULL вместо индексов сортировки.
+    """
+    return models.Index(
+        fields=('deleted_at',),
+        name=name,
+        condition=Q(deleted_at__isnull=False)
+    )
+
+
+class SoftDeleteModel(models.Model):
+    """
+    Базовый класс объектов, удаляемых в два этапа: объект сразу
+    помечается удаленным и скрывается из API, а зависимые строки
+    частями удаляет команда purge_deleted.
+    """
+
+    deleted_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Дата удаления'
+    )
+
+    # Поля, сохраняемые при пометке удаления.
+    DELETION_FIELDS = ('deleted_at',)
+
+    class Meta:
+        abstract = True
+
+    def mark_deleted(self):
+        self.deleted_at = timezone.now()
+        self.save(update_fields=self.DELETION_FIELDS)
+
+
+class User(SoftDeleteModel, AbstractUser):
     """Класс кастомного пользователя."""
 
     username = models.CharField(
@@ -68,11 +140,21 @@ class User(AbstractUser):
         verbose_name='Код подтверждения',
         max_length=LENGTH_CONFIRMATION_CODE,
     )
+    token_version = models.PositiveIntegerField(
+        verbose_name='Версия токенов',
+        default=0,
+        editable=False,
+    )
+
+    # Поля, значения которых выпущенные токены хранят в утверждениях.
+    TOKEN_FIELDS = ('role', 'is_staff', 'is_superuser', 'is_active')
+    DELETION_FIELDS = ('deleted_at', 'is_active')
 
     class Meta:
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
         ordering = ('username',)
+        indexes = [deleted_index('user_deleted_at_idx')]
 
     @property
     def is_user(self):
@@ -86,6 +168,38 @@ class User(AbstractUser):
     def is_admin(self):
         return self.is_staff or self.role == UserRoles.ADMIN
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._token_state = instance.get_token_state()
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._token_state = self.get_token_state()
+
+    def get_token_state(self):
+        return tuple(self.__dict__.get(field) for field in self.TOKEN_FIELDS)
+
+    def mark_deleted(self):
+        # Отключение пользователя отзывает его токены, а его отзывы
+        # перестают учитываться в рейтинге произведений.
+        self.is_active = False
+        with transaction.atomic():
+            super().mark_deleted()
+            Title.objects.filter(reviews__author=self).recalculate_rating()
+
+    def save(self, *args, **kwargs):
+        # Смена прав делает недействительными ранее выпущенные токены.
+        token_state = getattr(self, '_token_state', None)
+        if token_state is not None and token_state != self.get_token_state():
+            self.token_version += 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'token_version'}
+        super().save(*args, **kwargs)
+        self._token_state = self.get_token_state()
+
     def __str__(self):
         return (
             f'Никнейм: {self.username[:20]}, '
@@ -115,12 +229,13 @@ class BaseDescriptionModel(models.Model):
         return self.name
 
 
-class Category(BaseDescriptionModel):
+class Category(SoftDeleteModel, BaseDescriptionModel):
     """Класс категории."""
 
     class Meta(BaseDescriptionModel.Meta):
         verbose_name = 'Категория'
         verbose_name_plural = 'Категории'
+        indexes = [deleted_index('category_deleted_at_idx')]
 
 
 class Genre(BaseDescriptionModel):
@@ -131,7 +246,65 @@ class Genre(BaseDescriptionModel):
         verbose_name_plural = 'Жанры'
 
 
-class Title(models.Model):
+# Отправляется после пересчета рейтинга произведений по таблице отзывов.
+rating_recalculated = Signal()
+
+
+class TitleQuerySet(models.QuerySet):
+    """QuerySet произведений с обслуживанием рейтинга и отметки изменений."""
+
+    def touch(self):
+        """Отмечает произведения измененными без сохранения моделей."""
+        return self.update(updated_at=timezone.now())
+
+    def change_rating(self, score_delta, count_delta):
+        """
+        Атомарно сдвигает сохраненные сумму оценок и число отзывов
+        одним UPDATE и пересчитывает по ним рейтинг и взвешенный рейтинг.
+        """
+        score_sum = F('score_sum') + score_delta
+        review_count = F('review_count') + count_delta
+        return self.update(
+            score_sum=score_sum,
+            review_count=review_count,
+            rating=average_score(score_sum, review_count),
+            weighted_rating=weighted_score(score_sum, review_count),
+            updated_at=timezone.now()
+        )
+
+    def recalculate_rating(self):
+        """
+        Пересчитывает сумму оценок, число отзывов и рейтинг по таблице
+        отзывов одним UPDATE и сбрасывает гистограммы оценок.
+        Используется для массовых операций, минующих сигналы модели
+        отзыва.
+        """
+        reviews = Review.objects.filter(
+            title=OuterRef('pk'), is_hidden=False,
+            author__deleted_at__isnull=True
+        ).order_by().values('title')
+        score_sum = Coalesce(
+            Subquery(reviews.annotate(total=Sum('score')).values('total')),
+            Value(0)
+        )
+        review_count = Coalesce(
+            Subquery(reviews.annotate(total=Count('pk')).values('total')),
+            Value(0)
+        )
+        # Гистограммы оценок пересобираются по отзывам при чтении.
+        ScoreHistogram.objects.filter(title__in=self.values('pk')).delete()
+        updated = self.update(
+            score_sum=score_sum,
+            review_count=review_count,
+            rating=average_score(score_sum, review_count),
+            weighted_rating=weighted_score(score_sum, review_count),
+            updated_at=timezone.now()
+        )
+        rating_recalculated.send(sender=Title)
+        return updated
+
+
+class Title(SoftDeleteModel):
     """Класс произведения."""
 
     name = models.CharField(
@@ -158,11 +331,71 @@ class Title(models.Model):
         verbose_name='Категория',
         related_name='titles',
     )
+    score_sum = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Сумма оценок'
+    )
+    review_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество отзывов'
+    )
+    rating = models.FloatField(
+        null=True,
+        editable=False,
+        verbose_name='Рейтинг'
+    )
+    weighted_rating = models.FloatField(
+        null=True,
+        editable=False,
+        verbose_name='Взвешенный рейтинг'
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        db_index=True,
+        verbose_name='Дата изменения'
+    )
+
+    objects = TitleQuerySet.as_manager()
+
+    DELETION_FIELDS = ('deleted_at', 'updated_at')
 
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
         ordering = ('name',)
+        indexes = [
+            models.Index(fields=('name', 'id'), name='title_name_id_idx'),
+            deleted_index('title_deleted_at_idx'),
+            models.Index(
+                fields=('year', 'id'),
+                name='title_year_id_idx',
+                condition=Q(deleted_at__isnull=True)
+            ),
+            # Рейтинги лидеров читаются с конца этих индексов; в них
+            # только не удаленные произведения.
+            models.Index(
+                fields=('rating', 'id'),
+                name='title_rating_id_idx',
+                condition=Q(deleted_at__isnull=True)
+            ),
+            models.Index(
+                fields=('weighted_rating', 'id'),
+                name='title_weighted_rating_id_idx',
+                condition=Q(deleted_at__isnull=True)
+            ),
+            models.Index(
+                fields=('category', 'rating', 'id'),
+                name='title_category_rating_idx',
+                condition=Q(deleted_at__isnull=True)
+            ),
+            models.Index(
+                fields=('category', 'weighted_rating', 'id'),
+                name='title_category_weighted_idx',
+                condition=Q(deleted_at__isnull=True)
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -174,6 +407,7 @@ class BaseDiscussionModel(models.Model):
     author = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name='%(class)ss')
     pub_date = models.DateTimeField('Дата публикации', auto_now_add=True)
+    is_hidden = models.BooleanField('Скрыт модератором', default=False)
 
     class Meta:
         abstract = True
@@ -205,6 +439,174 @@ class Review(BaseDiscussionModel):
                 name='unique_author_title'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=('title', 'pub_date', 'id'),
+                name='review_title_pub_date_idx'
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_rating_state()
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self.remember_rating_state()
+
+    def remember_rating_state(self):
+        """
+        Запоминает произведение, оценку и скрытость отзыва, учтенные
+        в рейтинге.
+        """
+        score = self.__dict__.get('score')
+        self._rated = (
+            self.__dict__.get('title_id'),
+            None if score is None else int(score),
+            self.__dict__.get('is_hidden')
+        )
+
+    def save(self, *args, **kwargs):
+        # Отзыв и рейтинг произведения сохраняются в одной транзакции.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+SCORES = range(MIN_VALUE_SCORE, MAX_VALUE_SCORE + 1)
+
+
+def bucket_name(score):
+    return f'score_{score}'
+
+
+class ScoreHistogram(models.Model):
+    """
+    Число видимых отзывов произведения с каждой оценкой.
+
+    Строка обновляется сигналами отзывов на месте, через F-выражения,
+    а недостающая собирается по таблице отзывов в той же транзакции,
+    что и запись отзыва. Массовые операции удаляют строку; пока ее нет,
+    чтение считает гистограмму по таблице отзывов, ничего не записывая.
+    """
+
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='score_histogram',
+        verbose_name='Произведение'
+    )
+    # Столбец-счетчик на каждое допустимое значение оценки (SCORES).
+    score_1 = models.PositiveIntegerField(
+        default=0, verbose_name='Оценок 1'
+    )
+    score_2 = models.PositiveIntegerField(
+        default=0, verbose_name='Оценок 2'
+    )
+    score_3 = models.PositiveIntegerField(
+        default=0, verbose_name='Оценок 3'
+    )
+    score_4 = models.PositiveIntegerField(
+        default=0, verbose_name='Оценок 4'
+    )
+    score_5 = models.PositiveIntegerField(
+        default=0, verbose_name='Оценок 5'
+    )
+    score_6 = models.PositiveIntegerField(
+        default=0, verbose_name='Оценок 6'
+    )
+    score_7 = models.PositiveIntegerField(
+        default=0, verbose_name='Оценок 7'
+    )
+    score_8 = models.PositiveIntegerField(
+        default=0, verbose_name='Оценок 8'
+    )
+    score_9 = models.PositiveIntegerField(
+        default=0, verbose_name='Оценок 9'
+    )
+    score_10 = models.PositiveIntegerField(
+        default=0, verbose_name='Оценок 10'
+    )
+
+    class Meta:
+        verbose_name = 'Гистограмма оценок'
+        verbose_name_plural = 'Гистограммы оценок'
+
+    @classmethod
+    def shift(cls, deltas, create=True):
+        """
+        Сдвигает счетчики {(id произведения, оценка): delta}. Недостающую
+        строку при create собирает по таблице отзывов: вызывается в
+        транзакции записи отзыва, и таблица уже содержит изменение.
+        При удалении строка не создается: произведение может удаляться
+        вместе с отзывами.
+        """
+        titles = {}
+        for (title_id, score), delta in deltas.items():
+            titles.setdefault(title_id, {})[bucket_name(score)] = delta
+        for title_id, changes in titles.items():
+            updated = cls.objects.filter(title_id=title_id).update(**{
+                name: F(name) + delta for name, delta in changes.items()
+            })
+            if not updated and create:
+                cls.objects.get_or_create(
+                    title_id=title_id, defaults=cls.count(title_id)
+                )
+
+    @staticmethod
+    def count(title_id):
+        """Значения счетчиков по таблице видимых отзывов."""
+        counts = dict(Review.objects.filter(
+            title_id=title_id, is_hidden=False,
+            author__deleted_at__isnull=True
+        ).order_by().values_list('score').annotate(Count('pk')))
+        return {bucket_name(score): counts.get(score, 0) for score in SCORES}
+
+    @classmethod
+    def get_for_title(cls, title_id):
+        histogram = cls.objects.filter(title_id=title_id).first()
+        if histogram is not None:
+            return histogram
+        return cls(title_id=title_id, **cls.count(title_id))
+
+    @property
+    def counts(self):
+        return {score: getattr(self, bucket_name(score)) for score in SCORES}
+
+    def get_stats(self):
+        """Число оценок, среднее, дисперсия и медиана по гистограмме."""
+        counts = self.counts
+        total = sum(counts.values())
+        if not total:
+            return {
+                'count': 0, 'distribution': counts,
+                'mean': None, 'variance': None, 'median': None
+            }
+        mean = sum(score * count for score, count in counts.items()) / total
+        variance = sum(
+            count * (score - mean) ** 2 for score, count in counts.items()
+        ) / total
+        return {
+            'count': total,
+            'distribution': counts,
+            'mean': mean,
+            'variance': variance,
+            'median': (
+                self.score_at(counts, (total - 1) // 2)
+                + self.score_at(counts, total // 2)
+            ) / 2
+        }
+
+    @staticmethod
+    def score_at(counts, position):
+        """Оценка на позиции position в упорядоченном списке оценок."""
+        for score, count in counts.items():
+            if position < count:
+                return score
+            position -= count
+        return None
 
 
 class Comment(BaseDiscussionModel):
@@ -216,3 +618,78 @@ class Comment(BaseDiscussionModel):
     class Meta(BaseDiscussionModel.Meta):
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(
+                fields=('review', 'pub_date', 'id'),
+                name='comment_review_pub_date_idx'
+            ),
+        ]
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку."""
+
+    subject = models.CharField('Тема', max_length=MAX_LENGTH_NAME)
+    body = models.TextField('Текст')
+    from_email = models.EmailField('Отправитель', max_length=MAX_LENGTH_EMAIL)
+    recipient = models.EmailField('Получатель', max_length=MAX_LENGTH_EMAIL)
+    created_at = models.DateTimeField('Дата постановки', auto_now_add=True)
+    next_attempt_at = models.DateTimeField(
+        'Время следующей попытки',
+        default=timezone.now
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    sent_at = models.DateTimeField('Дата отправки', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        ordering = ('next_attempt_at', 'id')
+        indexes = [
+            models.Index(
+                fields=('sent_at', 'next_attempt_at'),
+                name='outgoing_email_due_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject[:30]}'
+
+
+class ImportCheckpoint(models.Model):
+    """Отметка о последнем импорте CSV-файла."""
+
+    source = models.CharField('Файл', max_length=MAX_LENGTH_NAME, unique=True)
+    digest = models.CharField('Контрольная сумма', max_length=64)
+    rows = models.PositiveIntegerField('Строк')
+    imported_at = models.DateTimeField('Дата импорта', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Отметка импорта'
+        verbose_name_plural = 'Отметки импорта'
+        ordering = ('source',)
+
+    def __str__(self):
+        return self.source
+
+
+class ImportFingerprint(models.Model):
+    """Отпечаток строки CSV-файла для поиска изменившихся строк."""
+
+    file_name = models.CharField('Файл', max_length=MAX_LENGTH_SLUG)
+    row_id = models.BigIntegerField('id строки')
+    fingerprint = models.BigIntegerField('Отпечаток')
+
+    class Meta:
+        verbose_name = 'Отпечаток строки импорта'
+        verbose_name_plural = 'Отпечатки строк импорта'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['file_name', 'row_id'],
+                name='unique_import_fingerprint'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.file_name}:{self.row_id}'
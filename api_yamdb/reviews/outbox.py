@@ -0,0 +1,79 @@
+from datetime import timedelta
+from smtplib import SMTPException
+
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+
+from .models import OutgoingEmail
+from api_yamdb.settings import (
+    EMAIL_OUTBOX_BATCH_SIZE,
+    EMAIL_OUTBOX_MAX_ATTEMPTS,
+    EMAIL_OUTBOX_RETRY_DELAY
+)
+
+
+def enqueue_email(subject, body, from_email, recipient):
+    """Ставит письмо в очередь; отправка выполняется командой send_emails."""
+    return OutgoingEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email,
+        recipient=recipient
+    )
+
+
+def get_due_emails():
+    return OutgoingEmail.objects.filter(
+        sent_at__isnull=True,
+        attempts__lt=EMAIL_OUTBOX_MAX_ATTEMPTS,
+        next_attempt_at__lte=timezone.now()
+    )
+
+
+def deliver_outbox(batch_size=EMAIL_OUTBOX_BATCH_SIZE):
+    """
+    Отправляет пачку писем из очереди через одно соединение почтового
+    бэкенда. Неудачные письма откладываются с экспоненциальной паузой.
+    Доставка «хотя бы один раз»: при падении процесса между отправкой
+    и записью результата письмо уйдет повторно.
+    Возвращает пару (отправлено, не отправлено).
+    """
+    emails = list(get_due_emails()[:batch_size])
+    if not emails:
+        return 0, 0
+    sent, failed = [], []
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+        for email in emails:
+            try:
+                connection.send_messages([EmailMessage(
+                    subject=email.subject,
+                    body=email.body,
+                    from_email=email.from_email,
+                    to=(email.recipient,),
+                    connection=connection
+                )])
+            except (SMTPException, OSError) as error:
+                email.last_error = str(error)
+                failed.append(email)
+            else:
+                email.sent_at = timezone.now()
+                sent.append(email)
+    except (SMTPException, OSError) as error:
+        for email in emails[len(sent) + len(failed):]:
+            email.last_error = str(error)
+            failed.append(email)
+    finally:
+        connection.close()
+    now = timezone.now()
+    for email in failed:
+        email.attempts += 1
+        email.next_attempt_at = now + timedelta(
+            seconds=EMAIL_OUTBOX_RETRY_DELAY * 2 ** (email.attempts - 1)
+        )
+    OutgoingEmail.objects.bulk_update(sent, ('sent_at',))
+    OutgoingEmail.objects.bulk_update(
+        failed, ('attempts', 'last_error', 'next_attempt_at')
+    )
+    return len(sent), len(failed)
@@ -0,0 +1,266 @@
+import time
+from array import array
+from bisect import bisect_left, insort
+from threading import RLock
+
+from django.core.cache import cache
+from django.db import transaction
+
+from api_yamdb.settings import IN_MEMORY_INDEXES
+
+from .models import Category, Genre, Title
+
+
+# Во сколько раз список должен быть длиннее множества, чтобы проверять
+# элементы множества двоичным поиском вместо прохода по списку.
+BISECT_RATIO = 20
+
+
+def contains(ids, pk):
+    position = bisect_left(ids, pk)
+    return position < len(ids) and ids[position] == pk
+
+
+def add_id(ids, pk):
+    if not contains(ids, pk):
+        insort(ids, pk)
+
+
+def remove_id(ids, pk):
+    if contains(ids, pk):
+        del ids[bisect_left(ids, pk)]
+
+
+def intersect(found, ids):
+    """Элементы множества found, входящие в отсортированный массив ids."""
+    if len(found) * BISECT_RATIO < len(ids):
+        return {pk for pk in found if contains(ids, pk)}
+    return found.intersection(ids)
+
+
+def match(conditions, limit=None):
+    """
+    Множество id, входящих хотя бы в один список каждого условия.
+
+    Условия проверяются от самого короткого по сумме длин списков:
+    его объединение фильтруется остальными. С limit возвращает None,
+    как только ясно, что найдется больше limit id; единственное
+    условие со списком длиннее limit отбрасывается без объединения.
+    """
+    conditions = sorted(
+        conditions, key=lambda lists: sum(len(ids) for ids in lists)
+    )
+    first = conditions[0]
+    if limit is not None and len(conditions) == 1 and any(
+        len(ids) > limit for ids in first
+    ):
+        return None
+    found = set().union(*first)
+    for lists in conditions[1:]:
+        if not found:
+            break
+        found = set().union(*(intersect(found, ids) for ids in lists))
+    if limit is not None and len(found) > limit:
+        return None
+    return found
+
+
+class VersionedIndex:
+    """
+    Индекс в памяти процесса, согласованный с базой через версию в
+    общем кэше.
+
+    Индекс строится при первом обращении в каждом процессе и затем
+    поддерживается сигналами после фиксации транзакции. Записи
+    увеличивают версию; процесс, увидевший чужую версию, перестраивает
+    свой индекс, поэтому изменения из других процессов и операции без
+    сигналов (импорт, пакетное создание) не теряются. Без общего кэша
+    (IN_MEMORY_INDEXES) индексом не пользуются: enabled() ложно.
+    """
+
+    version_key = None
+
+    def __init__(self):
+        self.lock = RLock()
+        self.version = None
+
+    def build(self):
+        raise NotImplementedError
+
+    @staticmethod
+    def enabled():
+        return IN_MEMORY_INDEXES
+
+    def ensure_current(self):
+        """Перестраивает индекс, если его версия отстала от общей."""
+        cache.add(self.version_key, time.time_ns(), None)
+        version = cache.get(self.version_key)
+        if version != self.version:
+            self.build()
+            self.version = version
+
+    def apply(self, change):
+        """
+        Применяет изменение к индексу и увеличивает общую версию.
+        Если версию успели увеличить другие процессы, индекс будет
+        перестроен при следующем чтении.
+        """
+        with self.lock:
+            try:
+                version = cache.incr(self.version_key)
+            except ValueError:
+                self.version = None
+                return
+            if self.version is None or self.version != version - 1:
+                self.version = None
+                return
+            change()
+            self.version = version
+
+    def apply_locally(self, change):
+        """
+        Применяет изменение только к индексу этого процесса, не трогая
+        общую версию: другие процессы подтягивают такие изменения сами.
+        """
+        with self.lock:
+            if self.version is not None:
+                change()
+
+    def invalidate(self):
+        """Помечает индексы всех процессов устаревшими."""
+        with self.lock:
+            try:
+                cache.incr(self.version_key)
+            except ValueError:
+                pass
+            self.version = None
+
+
+class TitlePostings(VersionedIndex):
+    """
+    Списки id не удаленных произведений по жанрам, категориям и годам:
+    отсортированные массивы array('q'), по одному на значение.
+    """
+
+    version_key = 'title-postings:version'
+
+    def __init__(self):
+        super().__init__()
+        self.genres = {}
+        self.categories = {}
+        self.years = {}
+        self.genre_slugs = {}
+        self.category_slugs = {}
+
+    def build(self):
+        genres, categories, years = {}, {}, {}
+        titles = Title.objects.filter(deleted_at__isnull=True)
+        for pk, category_id, year in titles.order_by('pk').values_list(
+            'pk', 'category_id', 'year'
+        ).iterator():
+            years.setdefault(year, array('q')).append(pk)
+            if category_id is not None:
+                categories.setdefault(category_id, array('q')).append(pk)
+        for genre_id, title_id in Title.genre.through.objects.filter(
+            title__deleted_at__isnull=True
+        ).order_by('title_id').values_list('genre_id', 'title_id').iterator():
+            genres.setdefault(genre_id, array('q')).append(title_id)
+        self.genres, self.categories, self.years = genres, categories, years
+        self.genre_slugs = dict(Genre.objects.values_list('slug', 'pk'))
+        self.category_slugs = dict(Category.objects.filter(
+            deleted_at__isnull=True
+        ).values_list('slug', 'pk'))
+
+    def find(self, genres=(), genre_mode='any', categories=(),
+             year_min=None, year_max=None, limit=None):
+        """
+        Отсортированный список id произведений, подходящих под фильтры:
+        списки жанров объединяются (или пересекаются при genre_mode=all),
+        категорий и лет из диапазона - объединяются, затем условия
+        пересекаются. None, если найдено больше limit произведений
+        или индекс выключен.
+        """
+        if not self.enabled():
+            return None
+        with self.lock:
+            self.ensure_current()
+            conditions = []
+            if genres:
+                lists = [
+                    self.genres.get(self.genre_slugs.get(slug), ())
+                    for slug in genres
+                ]
+                if genre_mode == 'all':
+                    conditions.extend([ids] for ids in lists)
+                else:
+                    conditions.append(lists)
+            if categories:
+                conditions.append([
+                    self.categories.get(self.category_slugs.get(slug), ())
+                    for slug in categories
+                ])
+            if year_min is not None or year_max is not None:
+                conditions.append([
+                    ids for year, ids in self.years.items()
+                    if (year_min is None or year >= year_min)
+                    and (year_max is None or year <= year_max)
+                ])
+            found = match(conditions, limit)
+            return None if found is None else sorted(found)
+
+    def remove_title(self, pk):
+        for lists in (self.genres, self.categories, self.years):
+            for ids in lists.values():
+                remove_id(ids, pk)
+
+    def save_title(self, pk, category_id, year, deleted):
+        """
+        Переносит произведение в списки его года и категории; жанры
+        меняются отдельно сигналом m2m_changed.
+        """
+        if deleted:
+            self.remove_title(pk)
+            return
+        for lists in (self.categories, self.years):
+            for ids in lists.values():
+                remove_id(ids, pk)
+        add_id(self.years.setdefault(year, array('q')), pk)
+        if category_id is not None:
+            add_id(self.categories.setdefault(category_id, array('q')), pk)
+
+    def link(self, title_ids, genre_ids, linked):
+        for genre_id in genre_ids:
+            ids = self.genres.setdefault(genre_id, array('q'))
+            for title_id in title_ids:
+                (add_id if linked else remove_id)(ids, title_id)
+
+    def unlink_all(self, title_id):
+        for ids in self.genres.values():
+            remove_id(ids, title_id)
+
+    def set_slug(self, kind, pk, slug):
+        """Обновляет слаг жанра (kind='genre') или категории."""
+        slugs = getattr(self, f'{kind}_slugs')
+        for old_slug in [key for key, value in slugs.items() if value == pk]:
+            del slugs[old_slug]
+        if slug is not None:
+            slugs[slug] = pk
+
+    def drop(self, kind, pk):
+        """Удаляет список и слаг жанра (kind='genre') или категории."""
+        lists = self.genres if kind == 'genre' else self.categories
+        lists.pop(pk, None)
+        self.set_slug(kind, pk, None)
+
+
+postings = TitlePostings()
+
+
+def change_postings(change):
+    """Применяет изменение индексов после фиксации транзакции."""
+    transaction.on_commit(lambda: postings.apply(change))
+
+
+def invalidate_postings():
+    """Помечает индексы устаревшими после записи в обход сигналов."""
+    transaction.on_commit(postings.invalidate)
@@ -0,0 +1,140 @@
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Category, Comment, Review, Title, User
+
+
+def delete_rows(model, ids):
+    """
+    Удаляет строки модели с переданными id одним DELETE, без сигналов
+    и каскадов. Возвращает число удаленных строк.
+    """
+    ids = list(ids)
+    if not ids:
+        return 0
+    quote = connection.ops.quote_name
+    placeholders = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {quote(model._meta.db_table)} '
+            f'WHERE {quote(model._meta.pk.column)} IN ({placeholders})',
+            ids
+        )
+        return cursor.rowcount
+
+
+def delete_in_chunks(queryset, chunk_size, before_delete=None):
+    """
+    Удаляет строки queryset пачками по chunk_size, каждую в отдельной
+    короткой транзакции, без сигналов и каскадов. before_delete(chunk)
+    может вернуть действие, выполняемое после удаления пачки в той же
+    транзакции.
+    """
+    deleted = 0
+    while True:
+        with transaction.atomic():
+            ids = list(queryset.order_by('pk').values_list(
+                'pk', flat=True
+            )[:chunk_size])
+            if not ids:
+                return deleted
+            chunk = queryset.model.objects.filter(pk__in=ids)
+            after_delete = before_delete(chunk) if before_delete else None
+            deleted += delete_rows(queryset.model, ids)
+            if after_delete is not None:
+                after_delete()
+
+
+def recalculate_after_delete(reviews):
+    """Пересчитывает рейтинг произведений удаляемой пачки отзывов."""
+    title_ids = set(reviews.values_list('title_id', flat=True))
+    return lambda: Title.objects.filter(pk__in=title_ids).recalculate_rating()
+
+
+def purge_title(title, chunk_size):
+    delete_in_chunks(Comment.objects.filter(review__title=title), chunk_size)
+    delete_in_chunks(Review.objects.filter(title=title), chunk_size)
+    delete_in_chunks(
+        Title.genre.through.objects.filter(title=title), chunk_size
+    )
+    title.delete()
+
+
+def purge_category(category, chunk_size):
+    titles = Title.objects.filter(category=category)
+    while True:
+        with transaction.atomic():
+            ids = list(titles.order_by('pk').values_list(
+                'pk', flat=True
+            )[:chunk_size])
+            if not ids:
+                break
+            Title.objects.filter(pk__in=ids).update(
+                category=None, updated_at=timezone.now()
+            )
+    category.delete()
+
+
+def purge_user(user, chunk_size):
+    delete_in_chunks(Comment.objects.filter(author=user), chunk_size)
+    delete_in_chunks(Comment.objects.filter(review__author=user), chunk_size)
+    delete_in_chunks(
+        Review.objects.filter(author=user), chunk_size,
+        before_delete=recalculate_after_delete
+    )
+    user.delete()
+
+
+PURGE_STEPS = (
+    (Title, purge_title),
+    (Category, purge_category),
+    (User, purge_user),
+)
+
+
+def get_dependents(obj):
+    """Строки, которые удаляются или изменяются вместе с объектом."""
+    if isinstance(obj, Title):
+        return (
+            Comment.objects.filter(review__title=obj),
+            Review.objects.filter(title=obj),
+            Title.genre.through.objects.filter(title=obj),
+        )
+    if isinstance(obj, Category):
+        return (Title.objects.filter(category=obj),)
+    return (
+        Comment.objects.filter(author=obj),
+        Comment.objects.filter(review__author=obj),
+        Review.objects.filter(author=obj),
+    )
+
+
+def delete_or_mark(obj, limit):
+    """
+    Удаляет объект сразу, если вместе с ним затрагивается меньше limit
+    строк, иначе помечает его удаленным для purge_deleted. Возвращает
+    True, если объект удален.
+    """
+    remaining = limit
+    for queryset in get_dependents(obj):
+        remaining -= queryset[:remaining].count()
+        if remaining <= 0:
+            obj.mark_deleted()
+            return False
+    obj.delete()
+    return True
+
+
+def purge_deleted(chunk_size):
+    """
+    Удаляет помеченные объекты и их зависимые строки частями.
+    Возвращает число удаленных объектов.
+    """
+    purged = 0
+    for model, purge in PURGE_STEPS:
+        for obj in model.objects.filter(
+            deleted_at__isnull=False
+        ).order_by('deleted_at', 'pk'):
+            purge(obj, chunk_size)
+            purged += 1
+    return purged
@@ -0,0 +1,141 @@
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from django.db.utils import OperationalError
+
+
+TITLE_TABLE = 'reviews_title'
+TITLE_FTS_TABLE = 'reviews_title_fts'
+
+TITLE_FTS_CREATE = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {TITLE_FTS_TABLE} USING fts5("
+    f"name, description, content='{TITLE_TABLE}', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')"
+)
+TITLE_FTS_TRIGGERS = {
+    f'{TITLE_FTS_TABLE}_ai': (
+        f'AFTER INSERT ON {TITLE_TABLE} BEGIN '
+        f'INSERT INTO {TITLE_FTS_TABLE}(rowid, name, description) '
+        'VALUES (new.id, new.name, new.description); END'
+    ),
+    f'{TITLE_FTS_TABLE}_ad': (
+        f'AFTER DELETE ON {TITLE_TABLE} BEGIN '
+        f'INSERT INTO {TITLE_FTS_TABLE}'
+        f'({TITLE_FTS_TABLE}, rowid, name, description) '
+        "VALUES ('delete', old.id, old.name, old.description); END"
+    ),
+    f'{TITLE_FTS_TABLE}_au': (
+        f'AFTER UPDATE OF name, description ON {TITLE_TABLE} BEGIN '
+        f'INSERT INTO {TITLE_FTS_TABLE}'
+        f'({TITLE_FTS_TABLE}, rowid, name, description) '
+        "VALUES ('delete', old.id, old.name, old.description); "
+        f'INSERT INTO {TITLE_FTS_TABLE}(rowid, name, description) '
+        'VALUES (new.id, new.name, new.description); END'
+    ),
+}
+
+_available = {}
+
+
+def fts5_supported(db):
+    if db.vendor != 'sqlite':
+        return False
+    try:
+        with db.cursor() as cursor:
+            cursor.execute(
+                'CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(probe)'
+            )
+            cursor.execute('DROP TABLE temp.fts5_probe')
+    except OperationalError:
+        return False
+    return True
+
+
+def install_title_search(db):
+    """
+    Создает FTS5-индекс произведений и триггеры его синхронизации.
+
+    SQLite теряет триггеры при пересоздании таблицы миграциями, поэтому
+    функция вызывается и после каждого migrate: недостающие триггеры
+    создаются заново, а индекс перестраивается.
+    """
+    _available.clear()
+    if (
+        TITLE_TABLE not in db.introspection.table_names()
+        or not fts5_supported(db)
+    ):
+        return
+    with db.cursor() as cursor:
+        cursor.execute(TITLE_FTS_CREATE)
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+            'AND tbl_name = %s',
+            (TITLE_TABLE,)
+        )
+        existing = {name for name, in cursor.fetchall()}
+        missing = set(TITLE_FTS_TRIGGERS) - existing
+        for name in sorted(missing):
+            cursor.execute(
+                f'CREATE TRIGGER {name} {TITLE_FTS_TRIGGERS[name]}'
+            )
+        if missing:
+            cursor.execute(
+                f"INSERT INTO {TITLE_FTS_TABLE}({TITLE_FTS_TABLE}) "
+                "VALUES ('rebuild')"
+            )
+
+
+def uninstall_title_search(db):
+    _available.clear()
+    if db.vendor != 'sqlite':
+        return
+    with db.cursor() as cursor:
+        for name in TITLE_FTS_TRIGGERS:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+        cursor.execute(f'DROP TABLE IF EXISTS {TITLE_FTS_TABLE}')
+
+
+def title_search_available():
+    """Проверяет наличие FTS5-индекса произведений в текущей БД."""
+    key = (connection.alias, connection.settings_dict['NAME'])
+    if key not in _available:
+        _available[key] = (
+            connection.vendor == 'sqlite'
+            and TITLE_FTS_TABLE in connection.introspection.table_names()
+        )
+    return _available[key]
+
+
+def title_match_expression(text, column='name'):
+    """
+    Преобразует поисковую строку в запрос FTS5: каждое слово ищется
+    по префиксу, все слова должны встретиться в колонке `column`.
+    """
+    words = re.findall(r'\w+', text)
+    if not words:
+        return None
+    return '{column} : ({terms})'.format(
+        column=column,
+        terms=' AND '.join(f'"{word}"*' for word in words)
+    )
+
+
+def search_titles(queryset, text, column='name'):
+    """
+    Отбирает произведения по FTS5-индексу и сортирует их по
+    релевантности (bm25). Возвращает None, если индекс недоступен.
+    """
+    expression = title_match_expression(text, column)
+    if expression is None or not title_search_available():
+        return None
+    return queryset.filter(id__in=RawSQL(
+        f'SELECT rowid FROM {TITLE_FTS_TABLE} '
+        f'WHERE {TITLE_FTS_TABLE} MATCH %s',
+        (expression,)
+    )).annotate(search_rank=RawSQL(
+        f'SELECT rank FROM {TITLE_FTS_TABLE} '
+        f'WHERE {TITLE_FTS_TABLE} MATCH %s '
+        f'AND rowid = {TITLE_TABLE}.id',
+        (expression,)
+    )).order_by('search_rank', 'name')
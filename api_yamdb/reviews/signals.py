@@ -0,0 +1,209 @@
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_save
+)
+from django.dispatch import receiver
+
+from .models import (
+    Category, Genre, Review, ScoreHistogram, Title, User,
+    rating_recalculated
+)
+from .postings import change_postings, invalidate_postings, postings
+from .suggest import (
+    change_names,
+    invalidate_names,
+    refresh_names_ratings,
+    shift_names_rating,
+    title_names
+)
+
+
+def change_rating(title_id, score_delta, count_delta):
+    """Сдвигает рейтинг произведения в базе и в индексе названий."""
+    Title.objects.filter(pk=title_id).change_rating(score_delta, count_delta)
+    shift_names_rating(title_id, score_delta, count_delta)
+
+
+def update_histogram(instance, created, rated_title_id, rated_score,
+                     rated_hidden):
+    """
+    Переносит отзыв между столбцами гистограмм оценок. Если прежнее
+    состояние неизвестно, рейтинг пересчитывается по таблице, и вместе
+    с ним сбрасываются гистограммы.
+    """
+    if not created and (rated_score is None or rated_hidden is None):
+        return
+    old = None if created or rated_hidden else (rated_title_id, rated_score)
+    new = None if instance.is_hidden else (
+        instance.title_id, int(instance.score)
+    )
+    if old == new:
+        return
+    deltas = {}
+    if old is not None:
+        deltas[old] = -1
+    if new is not None:
+        deltas[new] = 1
+    ScoreHistogram.shift(deltas)
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_review_save(sender, instance, created, raw, **kwargs):
+    """Учитывает созданный или измененный отзыв в рейтинге произведения."""
+    if raw:
+        return
+    rated_title_id, rated_score, rated_hidden = getattr(
+        instance, '_rated', (None, None, None)
+    )
+    score = int(instance.score)
+    update_histogram(
+        instance, created, rated_title_id, rated_score, rated_hidden
+    )
+    if created and not instance.is_hidden:
+        change_rating(instance.title_id, score, 1)
+    elif (
+        created or rated_title_id is None or rated_score is None
+        or rated_hidden is not False or instance.is_hidden
+    ):
+        # Скрытые отзывы в рейтинге не учитываются; их правка редка,
+        # поэтому рейтинг пересчитывается по таблице отзывов.
+        Title.objects.filter(
+            pk__in={rated_title_id, instance.title_id} - {None}
+        ).recalculate_rating()
+    elif rated_title_id != instance.title_id:
+        change_rating(rated_title_id, -rated_score, -1)
+        change_rating(instance.title_id, score, 1)
+    else:
+        # Изменение текста тоже меняет ответ списка отзывов произведения.
+        change_rating(instance.title_id, score - rated_score, 0)
+    instance.remember_rating_state()
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_review_delete(sender, instance, **kwargs):
+    """Исключает удаленный отзыв из рейтинга и гистограммы произведения."""
+    if instance.is_hidden:
+        return
+    ScoreHistogram.shift(
+        {(instance.title_id, int(instance.score)): -1}, create=False
+    )
+    change_rating(instance.title_id, -int(instance.score), -1)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def touch_title_on_genre_change(sender, instance, action, reverse, pk_set,
+                                **kwargs):
+    """Отмечает изменение произведений при смене их жанров."""
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            Title.objects.filter(pk=instance.pk).touch()
+    elif action in ('post_add', 'post_remove'):
+        Title.objects.filter(pk__in=pk_set).touch()
+    elif action == 'pre_clear':
+        Title.objects.filter(genre=instance).touch()
+
+
+@receiver(pre_save, sender=User)
+def remember_username_change(sender, instance, raw, update_fields,
+                             **kwargs):
+    instance._username_changed = (
+        not raw and instance.pk is not None
+        and (update_fields is None or 'username' in update_fields)
+        and User.objects.filter(pk=instance.pk).exclude(
+            username=instance.username
+        ).exists()
+    )
+
+
+@receiver(post_save, sender=User)
+def touch_titles_on_username_change(sender, instance, **kwargs):
+    """
+    Имя автора выводится в списке отзывов, отметкой изменения которого
+    служит updated_at произведения.
+    """
+    if getattr(instance, '_username_changed', False):
+        Title.objects.filter(reviews__author=instance).touch()
+        instance._username_changed = False
+
+
+@receiver(rating_recalculated, sender=Title)
+def refresh_names_on_recalculation(sender, **kwargs):
+    """Рейтинги пересчитаны без сигналов отзывов."""
+    refresh_names_ratings()
+
+
+@receiver(post_save, sender=Title)
+def update_names_on_title_save(sender, instance, raw, **kwargs):
+    """Добавляет, переименовывает или удаляет название в индексе."""
+    if raw:
+        invalidate_names()
+        return
+    pk, name = instance.pk, instance.name
+    score_sum, review_count = instance.score_sum, instance.review_count
+    deleted = instance.deleted_at is not None
+    change_names(lambda: title_names.save_title(
+        pk, name, score_sum, review_count, deleted
+    ))
+
+
+@receiver(post_delete, sender=Title)
+def update_names_on_title_delete(sender, instance, **kwargs):
+    pk = instance.pk
+    change_names(lambda: title_names.remove_title(pk))
+
+
+@receiver(post_save, sender=Title)
+def update_postings_on_title_save(sender, instance, raw, **kwargs):
+    """Переносит произведение в списки индекса его года и категории."""
+    if raw:
+        invalidate_postings()
+        return
+    pk, category_id, year = instance.pk, instance.category_id, instance.year
+    deleted = instance.deleted_at is not None
+    change_postings(
+        lambda: postings.save_title(pk, category_id, year, deleted)
+    )
+
+
+@receiver(post_delete, sender=Title)
+def update_postings_on_title_delete(sender, instance, **kwargs):
+    pk = instance.pk
+    change_postings(lambda: postings.remove_title(pk))
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def update_postings_on_genre_change(sender, instance, action, reverse,
+                                    pk_set, **kwargs):
+    """Добавляет и удаляет id произведений в списках жанров индекса."""
+    pk, pk_set = instance.pk, set(pk_set or ())
+    if action in ('post_add', 'post_remove'):
+        linked = action == 'post_add'
+        title_ids, genre_ids = (pk_set, {pk}) if reverse else ({pk}, pk_set)
+        change_postings(
+            lambda: postings.link(title_ids, genre_ids, linked)
+        )
+    elif action == 'post_clear' and not reverse:
+        change_postings(lambda: postings.unlink_all(pk))
+    elif action == 'pre_clear' and reverse:
+        change_postings(lambda: postings.genres.pop(pk, None))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Genre)
+def update_postings_slug(sender, instance, **kwargs):
+    kind = 'genre' if sender is Genre else 'category'
+    pk = instance.pk
+    # Категория, помеченная удаленной, по слагу не находится.
+    slug = None if getattr(instance, 'deleted_at', None) else instance.slug
+    change_postings(lambda: postings.set_slug(kind, pk, slug))
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Genre)
+def update_postings_on_delete(sender, instance, **kwargs):
+    """
+    Удаляет список жанра или категории: связи жанра удаляются каскадом,
+    а категория у произведений обнуляется без сигналов.
+    """
+    kind = 'genre' if sender is Genre else 'category'
+    pk = instance.pk
+    change_postings(lambda: postings.drop(kind, pk))
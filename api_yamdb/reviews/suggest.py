@@ -0,0 +1,246 @@
+import re
+import time
+from bisect import bisect_left, insort
+from datetime import timedelta
+from heapq import nsmallest
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from api_yamdb.settings import SUGGEST_RATING_REFRESH
+
+from .models import Title
+from .postings import VersionedIndex
+from .search import search_titles
+
+
+WORD = re.compile(r'\w+')
+# Символ больше любого символа названия: ключи с префиксом query лежат
+# в entries между (query,) и (query + LAST_CHAR,).
+LAST_CHAR = chr(0x10FFFF)
+
+
+def fold(text):
+    return text.casefold().replace('ё', 'е')
+
+
+def name_keys(name):
+    """
+    Ключи названия: приведенный к нижнему регистру остаток названия
+    с начала каждого слова, поэтому префикс ищется в любом слове.
+    """
+    folded = fold(name)
+    return sorted({folded[word.start():] for word in WORD.finditer(folded)})
+
+
+def remove_item(items, item):
+    position = bisect_left(items, item)
+    if position < len(items) and items[position] == item:
+        del items[position]
+
+
+class TitleNames(VersionedIndex):
+    """
+    Префиксный индекс названий не удаленных произведений: отсортированный
+    список пар (ключ, id) для поиска двоичным поиском, суммы оценок
+    с числом отзывов и список id по убыванию рейтинга.
+
+    Короткий префикс совпадает с большой долей названий, поэтому вместо
+    отбора лучших среди всех совпадений ранжированный список
+    просматривается сверху до limit подходящих произведений.
+
+    Общую версию меняют только добавление, переименование и удаление
+    названий. Сдвиги рейтинга применяются к индексу записавшего процесса,
+    а остальные раз в SUGGEST_RATING_REFRESH секунд перечитывают рейтинги
+    произведений, у которых с прошлой сверки сдвинулся updated_at.
+    """
+
+    version_key = 'title-names:version'
+
+    def __init__(self):
+        super().__init__()
+        self.entries = []
+        self.names = {}
+        self.keys = {}
+        self.ratings = {}
+        self.ranks = {}
+        self.ranked = []
+        self.refreshed_at = None
+        self.refresh_due = 0
+
+    def ensure_current(self):
+        super().ensure_current()
+        if time.monotonic() >= self.refresh_due:
+            self.refresh_ratings()
+
+    def build(self):
+        started = timezone.now()
+        entries, names, keys, ratings = [], {}, {}, {}
+        for pk, name, score_sum, review_count in Title.objects.filter(
+            deleted_at__isnull=True
+        ).values_list('pk', 'name', 'score_sum', 'review_count').iterator():
+            names[pk] = name
+            keys[pk] = name_keys(name)
+            ratings[pk] = [score_sum, review_count]
+            entries.extend((key, pk) for key in keys[pk])
+        entries.sort()
+        self.entries, self.names, self.keys = entries, names, keys
+        self.ratings = ratings
+        self.ranks = {pk: self.rank(pk) for pk in ratings}
+        self.ranked = sorted(self.ranks.values())
+        self.refreshed_at = started
+        self.refresh_due = time.monotonic() + SUGGEST_RATING_REFRESH
+
+    def refresh_ratings(self):
+        """
+        Перечитывает рейтинги произведений, измененных с прошлой сверки.
+        Окно захватывает еще один период назад: так не теряются записи
+        транзакций, зафиксированных после начала прошлой сверки.
+        """
+        started = timezone.now()
+        for pk, score_sum, review_count in Title.objects.filter(
+            updated_at__gte=self.refreshed_at - timedelta(
+                seconds=SUGGEST_RATING_REFRESH
+            ),
+            deleted_at__isnull=True
+        ).values_list('pk', 'score_sum', 'review_count').iterator():
+            if pk in self.ratings:
+                self.set_rating(pk, score_sum, review_count)
+        self.refreshed_at = started
+        self.refresh_due = time.monotonic() + SUGGEST_RATING_REFRESH
+
+    def rating(self, pk):
+        score_sum, review_count = self.ratings[pk]
+        return score_sum / review_count if review_count else None
+
+    def rank(self, pk):
+        """
+        Ключ порядка в ranked: по убыванию рейтинга, произведения без
+        оценок - после оцененных, при равенстве - по id.
+        """
+        rating = self.rating(pk)
+        if rating is None:
+            return (1, 0, pk)
+        return (0, -rating, pk)
+
+    def suggest(self, query, limit):
+        """
+        До limit пар (id, название) произведений, в названии которых
+        есть слово с префиксом query, по убыванию рейтинга.
+        """
+        if not self.enabled():
+            return suggest_from_db(query, limit)
+        query = fold(query.strip())
+        with self.lock:
+            self.ensure_current()
+            start = bisect_left(self.entries, (query,))
+            end = bisect_left(self.entries, (query + LAST_CHAR,), start)
+            # Отбор из m совпадений стоит порядка m, просмотр ранжированного
+            # списка до limit совпадений - порядка limit * n / m.
+            if (end - start) ** 2 <= limit * len(self.ranked):
+                best = [
+                    rank[-1] for rank in nsmallest(limit, {
+                        self.ranks[pk] for _, pk in self.entries[start:end]
+                    })
+                ]
+            else:
+                best = []
+                for rank in self.ranked:
+                    pk = rank[-1]
+                    if any(key.startswith(query) for key in self.keys[pk]):
+                        best.append(pk)
+                        if len(best) == limit:
+                            break
+            return [(pk, self.names[pk], self.rating(pk)) for pk in best]
+
+    def remove_title(self, pk):
+        if pk not in self.names:
+            return
+        remove_item(self.ranked, self.ranks.pop(pk))
+        del self.names[pk], self.ratings[pk]
+        for key in self.keys.pop(pk):
+            remove_item(self.entries, (key, pk))
+
+    def save_title(self, pk, name, score_sum, review_count, deleted):
+        """Добавляет, переименовывает или удаляет произведение."""
+        if deleted:
+            self.remove_title(pk)
+            return
+        if self.names.get(pk) == name:
+            return
+        rating = self.ratings.get(pk, [score_sum, review_count])
+        self.remove_title(pk)
+        self.names[pk] = name
+        self.keys[pk] = name_keys(name)
+        self.ratings[pk] = rating
+        self.ranks[pk] = self.rank(pk)
+        insort(self.ranked, self.ranks[pk])
+        for key in self.keys[pk]:
+            insort(self.entries, (key, pk))
+
+    def set_rating(self, pk, score_sum, review_count):
+        if self.ratings[pk] == [score_sum, review_count]:
+            return
+        remove_item(self.ranked, self.ranks[pk])
+        self.ratings[pk] = [score_sum, review_count]
+        self.ranks[pk] = self.rank(pk)
+        insort(self.ranked, self.ranks[pk])
+
+    def shift_rating(self, pk, score_delta, count_delta):
+        """
+        Повторяет в индексе сдвиг TitleQuerySet.change_rating. Сдвиг,
+        совпавший со сверкой рейтингов в другом потоке, может учесться
+        дважды; рейтинг здесь служит только для порядка подсказок
+        и выравнивается следующей сверкой.
+        """
+        if pk in self.ratings:
+            score_sum, review_count = self.ratings[pk]
+            self.set_rating(
+                pk, score_sum + score_delta, review_count + count_delta
+            )
+
+
+def suggest_from_db(query, limit):
+    """
+    Подсказки запросом к базе при выключенном индексе: слова ищутся
+    по префиксу в FTS5-индексе, без него - подстрокой названия. В отличие
+    от индекса в памяти, «ё» и «е» здесь различаются.
+    """
+    titles = Title.objects.filter(deleted_at__isnull=True)
+    found = search_titles(titles, query)
+    if found is None:
+        found = titles.filter(name__icontains=query.strip())
+    return list(found.order_by(
+        F('rating').desc(nulls_last=True), 'pk'
+    ).values_list('pk', 'name', 'rating')[:limit])
+
+
+title_names = TitleNames()
+
+
+def change_names(change):
+    """Применяет изменение индекса названий после фиксации транзакции."""
+    transaction.on_commit(lambda: title_names.apply(change))
+
+
+def shift_names_rating(pk, score_delta, count_delta):
+    """
+    Сдвигает рейтинг в индексе этого процесса после фиксации транзакции,
+    не вызывая перестройку индексов других процессов.
+    """
+    transaction.on_commit(lambda: title_names.apply_locally(
+        lambda: title_names.shift_rating(pk, score_delta, count_delta)
+    ))
+
+
+def refresh_names_ratings():
+    """Сверяет рейтинги индекса этого процесса после массового пересчета."""
+    transaction.on_commit(
+        lambda: title_names.apply_locally(title_names.refresh_ratings)
+    )
+
+
+def invalidate_names():
+    """Помечает индекс названий устаревшим после записи без сигналов."""
+    transaction.on_commit(title_names.invalidate)
@@ -0,0 +1,22 @@
+import pytest
+from django.core.cache import cache
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def in_memory_indexes(monkeypatch):
+    # Тесты идут в одном процессе, поэтому индексам хватает locmem-кэша.
+    monkeypatch.setattr('reviews.postings.IN_MEMORY_INDEXES', True)
+
+
+@pytest.fixture
+def shared_cache(monkeypatch):
+    # Тесты идут в одном процессе, поэтому версиям в кэше хватает locmem.
+    for module in ('api.authentication', 'api.cache', 'api.views'):
+        monkeypatch.setattr(f'{module}.SHARED_CACHE', True)
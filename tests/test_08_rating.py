@@ -0,0 +1,72 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08RatingAggregate:
+
+    TITLE_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+    REVIEW_DETAIL_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/'
+    )
+
+    def get_title(self, title_id):
+        from reviews.models import Title
+        return Title.objects.get(pk=title_id)
+
+    def test_01_rating_follows_review_changes(self, admin_client,
+                                              user_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        response = create_single_review(admin_client, title_id, 'Так', 4)
+        review_id = response.json()['id']
+        create_single_review(user_client, title_id, 'Сяк', 8)
+
+        title = self.get_title(title_id)
+        assert (title.score_sum, title.review_count) == (12, 2), (
+            'Проверьте, что при создании отзыва обновляются сохраненные '
+            'сумма оценок и количество отзывов произведения.'
+        )
+        url = self.REVIEW_DETAIL_URL_TEMPLATE.format(
+            title_id=title_id, review_id=review_id
+        )
+        response = admin_client.patch(url, data={'score': 10})
+        assert response.status_code == HTTPStatus.OK
+        title = self.get_title(title_id)
+        assert (title.score_sum, title.review_count) == (18, 2), (
+            'Проверьте, что при изменении оценки отзыва обновляется '
+            'сохраненная сумма оценок произведения.'
+        )
+        assert title.rating == 9
+
+        response = admin_client.delete(url)
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        response = admin_client.get(
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=title_id)
+        )
+        assert response.json().get('rating') == 8, (
+            'Проверьте, что после удаления отзыва рейтинг произведения '
+            'пересчитывается.'
+        )
+
+    def test_02_reconcile_ratings(self, admin_client, user_client):
+        from reviews.models import Title
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        create_single_review(user_client, title_id, 'Сойдет', 6)
+        Title.objects.filter(pk=title_id).update(
+            score_sum=0, review_count=0, rating=None
+        )
+
+        call_command('reconcile_ratings')
+        title = self.get_title(title_id)
+        assert (title.score_sum, title.review_count, title.rating) == (
+            6, 1, 6
+        ), (
+            'Проверьте, что команда `reconcile_ratings` восстанавливает '
+            'сумму оценок, количество отзывов и рейтинг произведения.'
+        )
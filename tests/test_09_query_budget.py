@@ -0,0 +1,129 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+QUERY_BUDGET = {
+    '/api/v1/titles/?limit={limit}': 4,
+    '/api/v1/titles/{title_id}/': 3,
+    '/api/v1/titles/{title_id}/reviews/?limit={limit}': 3,
+    '/api/v1/titles/{title_id}/reviews/{review_id}/': 2,
+    '/api/v1/titles/{title_id}/reviews/{review_id}/comments/?limit={limit}': 3,
+}
+
+
+def fill_catalog(count):
+    from reviews.models import Category, Comment, Genre, Review, Title, User
+    category = Category.objects.create(name='Фильм', slug='films')
+    genres = [
+        Genre.objects.create(name=f'Жанр {idx}', slug=f'genre-{idx}')
+        for idx in range(3)
+    ]
+    titles = []
+    for idx in range(count):
+        title = Title.objects.create(
+            name=f'Произведение {idx}', year=2000, category=category
+        )
+        title.genre.set(genres)
+        titles.append(title)
+    authors = [
+        User.objects.create(
+            username=f'author{idx}', email=f'author{idx}@yamdb.fake'
+        )
+        for idx in range(count)
+    ]
+    reviews = [
+        Review.objects.create(
+            title=titles[0], author=author, text='Отзыв', score=5
+        )
+        for author in authors
+    ]
+    Comment.objects.bulk_create(
+        Comment(review=reviews[0], author=author, text='Комментарий')
+        for author in authors
+    )
+    return titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09QueryBudget:
+
+    @pytest.mark.parametrize('url_template', QUERY_BUDGET)
+    def test_01_titles_query_budget(self, client, url_template):
+        titles = fill_catalog(20)
+        counts = []
+        for limit in (1, 20):
+            url = url_template.format(
+                limit=limit,
+                title_id=titles[0].id,
+                review_id=titles[0].reviews.order_by('id')[0].id
+            )
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(url)
+            assert response.status_code == 200
+            counts.append(len(context.captured_queries))
+        assert counts[0] == counts[1], (
+            f'Проверьте, что число запросов к БД при GET-запросе к '
+            f'`{url_template}` не зависит от размера страницы: '
+            f'{counts[0]} для одной записи и {counts[1]} для двадцати.'
+        )
+        assert counts[1] <= QUERY_BUDGET[url_template], (
+            f'GET-запрос к `{url_template}` выполняет {counts[1]} запросов '
+            f'к БД при бюджете {QUERY_BUDGET[url_template]}.'
+        )
+
+    def test_02_title_write_query_budget(self, admin_client):
+        from reviews.models import Category, Genre, Title
+        Category.objects.create(name='Фильм', slug='films')
+        Genre.objects.bulk_create(
+            Genre(name=f'Жанр {idx}', slug=f'genre-{idx}')
+            for idx in range(12)
+        )
+        data = {
+            'name': 'Произведение', 'year': 2000, 'category': 'films',
+            'genre': [f'genre-{idx}' for idx in range(10)]
+        }
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post('/api/v1/titles/', data=data)
+        assert response.status_code == 201
+        assert len(context.captured_queries) <= 7, (
+            'Проверьте, что при создании произведения слаги жанров и '
+            'категории разрешаются одним запросом, а связи с жанрами '
+            f'вставляются одной пачкой: {len(context.captured_queries)} '
+            'запросов к БД.'
+        )
+        title = Title.objects.get(pk=response.json()['id'])
+        assert title.genre.count() == 10
+
+        url = f'/api/v1/titles/{title.id}/'
+        data = {'genre': [f'genre-{idx}' for idx in range(2, 12)]}
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.patch(url, data=data)
+        assert response.status_code == 200
+        link_inserts = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('INSERT')
+        ]
+        assert len(link_inserts) == 1, (
+            'Проверьте, что новые связи с жанрами вставляются одним запросом.'
+        )
+        assert sorted(title.genre.values_list('slug', flat=True)) == sorted(
+            data['genre']
+        )
+        unchanged = Title.genre.through.objects.filter(
+            title=title, genre__slug='genre-5'
+        ).values_list('id', flat=True)
+        response = admin_client.patch(url, data={'genre': ['genre-5']})
+        assert Title.genre.through.objects.filter(
+            title=title, genre__slug='genre-5'
+        ).values_list('id', flat=True)[0] == unchanged[0], (
+            'Проверьте, что при изменении жанров неизменившиеся связи '
+            'не перезаписываются.'
+        )
+
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': 'Ошибка', 'year': 2000, 'category': 'nope',
+            'genre': ['genre-1', 'nope']
+        })
+        assert response.status_code == 400
+        assert set(response.json()) == {'category', 'genre'}
@@ -0,0 +1,49 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.test_09_query_budget import fill_catalog
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10CursorPagination:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def walk(self, client, url):
+        names = []
+        while url:
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.OK
+            data = response.json()
+            assert 'count' not in data, (
+                'Проверьте, что в курсорном режиме пагинации не '
+                'выполняется подсчет общего числа объектов.'
+            )
+            names.extend(title['name'] for title in data['results'])
+            url = data['next']
+        return names, data
+
+    def test_01_titles_cursor_walk(self, client):
+        titles = fill_catalog(7)
+        expected = sorted(title.name for title in titles)
+        names, last_page = self.walk(
+            client, f'{self.TITLES_URL}?cursor=&limit=3'
+        )
+        assert names == expected, (
+            f'Проверьте, что курсорная пагинация `{self.TITLES_URL}` '
+            'возвращает все произведения по одному разу в порядке названий.'
+        )
+
+        response = client.get(last_page['previous'])
+        assert response.status_code == HTTPStatus.OK
+        assert [
+            title['name'] for title in response.json()['results']
+        ] == expected[3:6], (
+            'Проверьте, что ссылка `previous` курсорной пагинации '
+            'возвращает предыдущую страницу.'
+        )
+
+    def test_02_invalid_cursor(self, client):
+        response = client.get(f'{self.TITLES_URL}?cursor=broken')
+        assert response.status_code == HTTPStatus.NOT_FOUND
@@ -0,0 +1,43 @@
+from http import HTTPStatus
+
+import pytest
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11TitleSearch:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def search(self, client, text):
+        response = client.get(self.TITLES_URL, {'name': text})
+        assert response.status_code == HTTPStatus.OK
+        return [title['name'] for title in response.json()['results']]
+
+    def test_01_prefix_search(self, client):
+        from reviews.models import Title
+        Title.objects.create(name='Мост через реку Квай', year=1957)
+        Title.objects.create(name='Мостовая', year=2001)
+        Title.objects.create(name='Крепкий орешек', year=1988)
+
+        assert sorted(self.search(client, 'мост')) == [
+            'Мост через реку Квай', 'Мостовая'
+        ], (
+            f'Проверьте, что фильтр `name` эндпоинта `{self.TITLES_URL}` '
+            'находит произведения по началу слов названия без учета '
+            'регистра.'
+        )
+        assert self.search(client, 'реку кв') == ['Мост через реку Квай']
+        assert self.search(client, 'орех') == []
+
+    def test_02_index_follows_title_changes(self, client):
+        from reviews.models import Title
+        title = Title.objects.create(name='Терминатор', year=1984)
+        title.name = 'Чужой'
+        title.save()
+        assert self.search(client, 'терм') == [], (
+            'Проверьте, что поисковый индекс обновляется при '
+            'переименовании произведения.'
+        )
+        assert self.search(client, 'чуж') == ['Чужой']
+        title.delete()
+        assert self.search(client, 'чуж') == []
@@ -0,0 +1,70 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12ListCache:
+
+    CATEGORY_URL = '/api/v1/categories/'
+    GENRE_URL = '/api/v1/genres/'
+
+    def test_01_list_is_cached_until_change(self, client, admin_client,
+                                            shared_cache):
+        admin_client.post(self.CATEGORY_URL, data={
+            'name': 'Фильм', 'slug': 'films'
+        })
+        response = client.get(self.CATEGORY_URL)
+        assert response['X-Cache'] == 'MISS'
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(self.CATEGORY_URL)
+        assert response['X-Cache'] == 'HIT'
+        assert not context.captured_queries, (
+            f'Проверьте, что повторный GET-запрос к `{self.CATEGORY_URL}` '
+            'обслуживается из кэша без обращения к БД.'
+        )
+        assert response.json()['count'] == 1
+
+        client.get(self.GENRE_URL)
+        response = client.get(f'{self.CATEGORY_URL}?search=Фильм')
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что параметры запроса входят в ключ кэша.'
+        )
+
+        admin_client.post(self.CATEGORY_URL, data={
+            'name': 'Книги', 'slug': 'books'
+        })
+        response = client.get(self.CATEGORY_URL)
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['count'] == 2, (
+            f'Проверьте, что создание категории сбрасывает кэш списка '
+            f'`{self.CATEGORY_URL}`.'
+        )
+        admin_client.delete(f'{self.CATEGORY_URL}books/')
+        assert client.get(self.CATEGORY_URL).json()['count'] == 1, (
+            f'Проверьте, что удаление категории сбрасывает кэш списка '
+            f'`{self.CATEGORY_URL}`.'
+        )
+
+        response = admin_client.get(f'{self.CATEGORY_URL}cache-stats/')
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == {'hits': 1, 'misses': 4}
+        response = client.get(f'{self.CATEGORY_URL}cache-stats/')
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+    def test_02_local_cache_is_bypassed(self, client, admin_client):
+        admin_client.post(self.CATEGORY_URL, data={
+            'name': 'Фильм', 'slug': 'films'
+        })
+        for _ in range(2):
+            response = client.get(self.CATEGORY_URL)
+            assert response['X-Cache'] == 'BYPASS', (
+                'Проверьте, что без общего кэша списки не кэшируются: '
+                'записи других процессов не сбросили бы их версию.'
+            )
+            assert response.json()['count'] == 1
+        response = admin_client.get(f'{self.CATEGORY_URL}cache-stats/')
+        assert response.json() == {'hits': 0, 'misses': 0}
@@ -0,0 +1,144 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.usefixtures('shared_cache')
+class Test13ConditionalGet:
+
+    TITLES_URL = '/api/v1/titles/'
+    TITLE_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+
+    def check_not_modified(self, client, url):
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        # Список произведений отдает только ETag, см. test_02.
+        assert response.has_header('ETag') and (
+            url == self.TITLES_URL or response.has_header('Last-Modified')
+        ), (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+            'заголовки `ETag` и `Last-Modified`.'
+        )
+        etag = response['ETag']
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{url}` с актуальным '
+            '`If-None-Match` возвращает ответ со статусом 304.'
+        )
+        # Версия списка произведений берется из кэша без запросов к БД.
+        assert len(context.captured_queries) == (
+            0 if url == self.TITLES_URL else 1
+        )
+        return etag
+
+    def test_01_titles_conditional_get(self, client, admin_client,
+                                       user_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        urls = (
+            self.TITLES_URL,
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=title_id),
+            self.REVIEWS_URL_TEMPLATE.format(title_id=title_id),
+        )
+        etags = [self.check_not_modified(client, url) for url in urls]
+
+        create_single_review(user_client, title_id, 'Отлично', 9)
+        for url, etag in zip(urls, etags):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что после добавления отзыва GET-запрос к '
+                f'`{url}` со старым `If-None-Match` возвращает ответ со '
+                'статусом 200.'
+            )
+
+        url = self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=title_id)
+        response = client.get(url)
+        response = client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+        etag = client.get(url)['ETag']
+        admin_client.patch(url, data={'genre': ['drama']})
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что изменение жанров произведения меняет его ETag.'
+        )
+
+    def test_02_titles_list_changes_on_delete(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        response = client.get(self.TITLES_URL)
+        assert not response.has_header('Last-Modified'), (
+            'Проверьте, что список произведений не отдает `Last-Modified`: '
+            'время последнего изменения не сдвигается при удалении.'
+        )
+        etag = response['ETag']
+        since = client.get(
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        )['Last-Modified']
+        admin_client.delete(
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=titles[1]['id'])
+        )
+        for headers in (
+            {'HTTP_IF_NONE_MATCH': etag},
+            {'HTTP_IF_MODIFIED_SINCE': since},
+        ):
+            response = client.get(self.TITLES_URL, **headers)
+            assert response.status_code == HTTPStatus.OK, (
+                'Проверьте, что после удаления произведения условный '
+                'GET-запрос к списку не получает ответ 304.'
+            )
+
+    def test_03_titles_marker_is_cheap(self, client, admin_client,
+                                       monkeypatch):
+        create_titles(admin_client)
+        for url in (self.TITLES_URL, f'{self.TITLES_URL}?cursor='):
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(url)
+            assert response.status_code == HTTPStatus.OK
+            assert not any(
+                'MAX(' in query['sql'] for query in context.captured_queries
+            ), (
+                'Проверьте, что отметка изменения списка произведений не '
+                'требует агрегата по всей таблице.'
+            )
+        etag = client.get(self.TITLES_URL)['ETag']
+        admin_client.patch(
+            f'{self.TITLES_URL}{response.json()["results"][0]["id"]}/',
+            data={'name': 'Новое название'}, format='json'
+        )
+        assert client.get(
+            self.TITLES_URL, HTTP_IF_NONE_MATCH=etag
+        ).status_code == HTTPStatus.OK
+
+        monkeypatch.setattr('api.views.SHARED_CACHE', False)
+        response = client.get(self.TITLES_URL)
+        assert not response.has_header('ETag'), (
+            'Проверьте, что без общего кэша версии в ETag не используются.'
+        )
+
+    def test_04_reviews_change_on_author_rename(self, client, admin_client,
+                                                user_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        create_single_review(user_client, title_id, 'Отлично', 9)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=title_id)
+        etag = client.get(url)['ETag']
+        response = admin_client.patch(
+            '/api/v1/users/TestUser/', data={'username': 'RenamedUser'},
+            format='json'
+        )
+        assert response.status_code == HTTPStatus.OK
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что смена имени автора меняет ETag списка его '
+            'отзывов.'
+        )
+        assert response.json()['results'][0]['author'] == 'RenamedUser'
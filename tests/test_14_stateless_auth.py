@@ -0,0 +1,95 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14StatelessAuth:
+
+    TOKEN_URL = '/api/v1/auth/token/'
+    CATEGORY_URL = '/api/v1/categories/'
+    USERS_URL = '/api/v1/users/'
+
+    def get_client(self, user):
+        user.confirmation_code = 'ABCDEFGHIJ'
+        user.save()
+        response = APIClient().post(self.TOKEN_URL, data={
+            'username': user.username,
+            'confirmation_code': user.confirmation_code
+        })
+        assert response.status_code == HTTPStatus.OK
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {response.json()["token"]}'
+        )
+        return client
+
+    @pytest.mark.usefixtures('shared_cache')
+    def test_01_admin_without_user_query(self, admin):
+        client = self.get_client(admin)
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(self.CATEGORY_URL, data={
+                'name': 'Фильм', 'slug': 'films'
+            })
+        assert response.status_code == HTTPStatus.CREATED
+        assert not any(
+            'reviews_user' in query['sql']
+            for query in context.captured_queries
+        ), (
+            'Проверьте, что аутентификация по токену с утверждениями о '
+            'роли не загружает пользователя из БД.'
+        )
+
+    def test_02_role_change_revokes_tokens(self, admin_client, user):
+        client = self.get_client(user)
+        response = client.get(f'{self.USERS_URL}me/')
+        assert response.status_code == HTTPStatus.OK
+
+        response = admin_client.patch(
+            f'{self.USERS_URL}{user.username}/', data={'role': 'moderator'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        response = client.get(f'{self.USERS_URL}me/')
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что смена роли пользователя делает '
+            'недействительными выпущенные ему токены.'
+        )
+        user.refresh_from_db()
+        client = self.get_client(user)
+        response = client.get(f'{self.USERS_URL}me/')
+        assert response.json()['role'] == 'moderator'
+
+    def test_03_inactive_user_is_rejected(self, admin):
+        client = self.get_client(admin)
+        assert client.get(self.USERS_URL).status_code == HTTPStatus.OK
+        admin.is_active = False
+        admin.save()
+        response = client.get(self.USERS_URL)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что токены неактивного пользователя отклоняются.'
+        )
+        response = APIClient().post(self.TOKEN_URL, data={
+            'username': admin.username,
+            'confirmation_code': admin.confirmation_code
+        })
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что неактивный пользователь не получает токен.'
+        )
+
+    def test_04_local_cache_reads_version_from_db(self, admin):
+        from django.db.models import F
+        from reviews.models import User
+        client = self.get_client(admin)
+        assert client.get(self.USERS_URL).status_code == HTTPStatus.OK
+        # Другой процесс меняет права: сигналы этого процесса не срабатывают.
+        User.objects.filter(pk=admin.pk).update(
+            role='user', token_version=F('token_version') + 1
+        )
+        response = client.get(self.USERS_URL)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что без общего кэша версия токена читается из БД '
+            'и смена прав в другом процессе сразу отзывает токены.'
+        )
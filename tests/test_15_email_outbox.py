@@ -0,0 +1,63 @@
+import pytest
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+
+
+class FailingEmailBackend(BaseEmailBackend):
+
+    def send_messages(self, email_messages):
+        raise OSError('Почтовый сервер недоступен')
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15EmailOutbox:
+
+    URL_SIGNUP = '/api/v1/auth/signup/'
+
+    def signup(self, client):
+        response = client.post(self.URL_SIGNUP, data={
+            'email': 'valid@yamdb.fake',
+            'username': 'valid_username'
+        })
+        assert response.status_code == 200
+
+    def test_01_signup_enqueues_email(self, client):
+        from reviews.models import OutgoingEmail
+        outbox_before_count = len(mail.outbox)
+        self.signup(client)
+        assert len(mail.outbox) == outbox_before_count, (
+            f'Проверьте, что POST-запрос к `{self.URL_SIGNUP}` ставит письмо '
+            'в очередь, а не отправляет его во время запроса.'
+        )
+        call_command('send_emails', '--once')
+        assert len(mail.outbox) == outbox_before_count + 1
+        assert OutgoingEmail.objects.get().sent_at is not None
+        call_command('send_emails', '--once')
+        assert len(mail.outbox) == outbox_before_count + 1, (
+            'Проверьте, что отправленное письмо не отправляется повторно.'
+        )
+
+    def test_02_failed_email_is_retried_later(self, client, settings):
+        from reviews.models import OutgoingEmail
+        self.signup(client)
+        settings.EMAIL_BACKEND = (
+            'tests.test_15_email_outbox.FailingEmailBackend'
+        )
+        call_command('send_emails', '--once')
+        email = OutgoingEmail.objects.get()
+        assert email.sent_at is None
+        assert email.attempts == 1 and email.last_error, (
+            'Проверьте, что ошибка отправки письма сохраняется в очереди '
+            'для повторной попытки.'
+        )
+
+        settings.EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+        outbox_before_count = len(mail.outbox)
+        call_command('send_emails', '--once')
+        assert len(mail.outbox) == outbox_before_count, (
+            'Проверьте, что повторная отправка откладывается.'
+        )
+        OutgoingEmail.objects.update(next_attempt_at=email.created_at)
+        call_command('send_emails', '--once')
+        assert len(mail.outbox) == outbox_before_count + 1
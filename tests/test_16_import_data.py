@@ -0,0 +1,190 @@
+import csv
+import shutil
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from tests.conftest import MANAGE_PATH
+
+
+DATA_PATH = f'{MANAGE_PATH}/static/data'
+
+
+def count_rows(file_name):
+    with open(f'{DATA_PATH}/{file_name}', newline='', encoding='utf-8') as f:
+        return sum(1 for _ in csv.DictReader(f))
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16ImportData:
+
+    def test_01_import_static_data(self):
+        from reviews.models import Comment, Review, Title, User
+        call_command('import_data', '--batch-size', '10', stdout=StringIO())
+        assert User.objects.count() == count_rows('users.csv')
+        assert Title.objects.count() == count_rows('titles.csv')
+        assert Review.objects.count() == count_rows('review.csv')
+        assert Comment.objects.count() == count_rows('comments.csv')
+        assert Title.genre.through.objects.count() == count_rows(
+            'genre_title.csv'
+        )
+        review = Review.objects.get(pk=1)
+        assert review.pub_date.isoformat().startswith('2019-09-24T21:08:21'), (
+            'Проверьте, что при импорте сохраняется дата публикации из CSV.'
+        )
+        title = Title.objects.get(pk=review.title_id)
+        scores = list(title.reviews.values_list('score', flat=True))
+        assert title.rating == sum(scores) / len(scores), (
+            'Проверьте, что после импорта рейтинг произведений пересчитан.'
+        )
+
+        out = StringIO()
+        call_command('import_data', stdout=out)
+        assert Review.objects.count() == count_rows('review.csv'), (
+            'Проверьте, что повторный импорт не дублирует записи.'
+        )
+
+    def test_02_dangling_references_are_skipped(self, tmp_path):
+        from reviews.models import Comment, User
+        for file_name in (
+            'users.csv', 'category.csv', 'genre.csv', 'titles.csv',
+            'genre_title.csv', 'review.csv'
+        ):
+            shutil.copy(f'{DATA_PATH}/{file_name}', tmp_path)
+        with open(tmp_path / 'comments.csv', 'w', newline='',
+                  encoding='utf-8') as f:
+            f.write(
+                'id,review_id,text,author,pub_date\n'
+                '1,1,Верно,100,2020-01-13T23:20:02.422Z\n'
+                '2,999999,Потерялся,100,2020-01-13T23:20:02.422Z\n'
+            )
+        out = StringIO()
+        with pytest.raises(CommandError):
+            call_command('import_data', '--path', str(tmp_path), stdout=out)
+        assert 'review_id=999999' in out.getvalue(), (
+            'Проверьте, что импорт сообщает о ссылках на отсутствующие '
+            'записи.'
+        )
+        assert not User.objects.exists(), (
+            'Проверьте, что при ошибках проверки импорт ничего не '
+            'записывает в БД.'
+        )
+
+        call_command(
+            'import_data', '--path', str(tmp_path), '--skip-invalid',
+            stdout=StringIO()
+        )
+        assert list(Comment.objects.values_list('id', flat=True)) == [1]
+
+    def test_03_incremental_import_writes_only_changes(self, tmp_path):
+        from reviews.models import Review, Title
+        shutil.copytree(DATA_PATH, tmp_path / 'data')
+        path = tmp_path / 'data'
+        call_command('import_data', '--path', str(path), stdout=StringIO())
+
+        with open(path / 'review.csv', newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+        rows[0]['score'] = '1'
+        with open(path / 'review.csv', 'w', newline='',
+                  encoding='utf-8') as f:
+            writer = csv.DictWriter(f, rows[0].keys())
+            writer.writeheader()
+            writer.writerows(rows)
+
+        out = StringIO()
+        call_command(
+            'import_data', '--path', str(path), '--incremental', stdout=out
+        )
+        output = out.getvalue()
+        assert 'users.csv: файл не изменился' in output, (
+            'Проверьте, что инкрементальный импорт пропускает '
+            'неизменившиеся файлы.'
+        )
+        assert 'обновлено 1, пропущено 71' in output, (
+            'Проверьте, что инкрементальный импорт записывает только '
+            'изменившиеся строки.'
+        )
+        assert (
+            f'Проверка ссылок: {count_rows("review.csv")} строк' in output
+        ), (
+            'Проверьте, что инкрементальный импорт не проверяет заново '
+            'неизменившиеся файлы.'
+        )
+        review = Review.objects.get(pk=rows[0]['id'])
+        assert review.score == 1
+        title = Title.objects.get(pk=review.title_id)
+        scores = list(title.reviews.values_list('score', flat=True))
+        assert title.rating == sum(scores) / len(scores)
+
+    def test_04_check_reports_all_problems_before_writing(self, tmp_path):
+        from reviews.models import User
+        shutil.copytree(DATA_PATH, tmp_path / 'data')
+        path = tmp_path / 'data'
+        with open(path / 'review.csv', 'a', newline='',
+                  encoding='utf-8') as f:
+            f.write(
+                '\n1,1,Повтор,100,5,2020-01-13T23:20:02.422Z\n'
+                '999998,888888,Без произведения,777777,5,'
+                '2020-01-13T23:20:02.422Z\n'
+            )
+        out = StringIO()
+        with pytest.raises(CommandError):
+            call_command('import_data', '--path', str(path), '--check',
+                         stdout=out)
+        output = out.getvalue()
+        for problem in (
+            'повторяется id=1', 'title_id=888888', 'author=777777',
+            'повторяется значение title_id,author=1,100'
+        ):
+            assert problem in output, (
+                'Проверьте, что проверка перед импортом сообщает обо всех '
+                'висячих ссылках и повторяющихся ключах.'
+            )
+        assert not User.objects.exists()
+
+    def test_05_parallel_parsing_matches_serial(self):
+        from reviews.models import Comment, Review, Title
+        call_command(
+            'import_data', '--workers', '2', '--batch-size', '7',
+            stdout=StringIO()
+        )
+        assert Review.objects.count() == count_rows('review.csv')
+        assert Comment.objects.count() == count_rows('comments.csv')
+        review = Review.objects.get(pk=1)
+        assert review.pub_date.isoformat().startswith('2019-09-24T21:08:21')
+        title = Title.objects.get(pk=review.title_id)
+        scores = list(title.reviews.values_list('score', flat=True))
+        assert title.rating == sum(scores) / len(scores)
+
+    def test_06_id_set(self):
+        from reviews.importer import IdSet
+        ids = IdSet([3, 1 << 40, -5])
+        assert ids.add(100) and not ids.add(3)
+        assert 3 in ids and 100 in ids and (1 << 40) in ids and -5 in ids
+        assert 4 not in ids and 10 ** 6 not in ids
+        assert len(ids) == 4
+
+    def test_07_unique_keys_are_checked_against_db(self):
+        from reviews.models import Review, User
+        User.objects.create(
+            id=999, username='bingobongo', email='other@yamdb.fake'
+        )
+        out = StringIO()
+        with pytest.raises(CommandError):
+            call_command('import_data', '--check', stdout=out)
+        assert (
+            'значение username=bingobongo уже есть в БД у записи id=999'
+            in out.getvalue()
+        ), (
+            'Проверьте, что проверка перед импортом сравнивает уникальные '
+            'значения с уже имеющимися в БД записями.'
+        )
+        with pytest.raises(CommandError):
+            call_command('import_data', stdout=StringIO())
+
+        call_command('import_data', '--skip-invalid', stdout=StringIO())
+        assert not User.objects.filter(pk=100).exists()
+        assert User.objects.get(username='bingobongo').pk == 999
+        assert not Review.objects.filter(author_id=100).exists()
+        assert Review.objects.exists()
@@ -0,0 +1,76 @@
+import csv
+import json
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17ExportData:
+
+    def test_01_csv_export_can_be_imported_back(self, tmp_path):
+        from reviews.models import Comment, Review, Title, User
+        call_command('import_data', stdout=StringIO())
+        counts = (
+            User.objects.count(), Title.objects.count(),
+            Title.genre.through.objects.count(), Review.objects.count(),
+            Comment.objects.count()
+        )
+        ratings = dict(Title.objects.values_list('pk', 'rating'))
+        call_command('export_data', '--path', str(tmp_path),
+                     '--chunk-size', '10', stdout=StringIO())
+        titles = read_csv(tmp_path / 'titles.csv')
+        assert len(titles) == counts[1]
+        assert 'rating' in titles[0], (
+            'Проверьте, что выгрузка произведений содержит рейтинг.'
+        )
+
+        User.objects.all().delete()
+        Title.objects.all().delete()
+        call_command('import_data', '--path', str(tmp_path),
+                     stdout=StringIO())
+        assert counts == (
+            User.objects.count(), Title.objects.count(),
+            Title.genre.through.objects.count(), Review.objects.count(),
+            Comment.objects.count()
+        ), 'Проверьте, что выгрузку в CSV можно загрузить import_data.'
+        assert dict(Title.objects.values_list('pk', 'rating')) == ratings
+        assert Review.objects.get(pk=1).pub_date.isoformat().startswith(
+            '2019-09-24T21:08:21'
+        )
+
+    def test_02_streaming_endpoint(self, admin_client, user_client):
+        from reviews.models import Review
+        call_command('import_data', stdout=StringIO())
+        url = '/api/v1/export/review.ndjson'
+        assert user_client.get(url).status_code == HTTPStatus.FORBIDDEN, (
+            'Проверьте, что выгрузка доступна только администратору.'
+        )
+        response = admin_client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert response.streaming, (
+            'Проверьте, что выгрузка отдается StreamingHttpResponse.'
+        )
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        assert len(lines) == Review.objects.count()
+        assert json.loads(lines[0])['id'] == 1
+
+        response = admin_client.get('/api/v1/export/titles.csv')
+        assert response['Content-Type'].startswith('text/csv')
+        content = b''.join(response.streaming_content).decode()
+        assert content.splitlines()[0] == (
+            'id,name,year,category,description,rating'
+        )
+        assert admin_client.get(
+            '/api/v1/export/unknown.csv'
+        ).status_code == HTTPStatus.NOT_FOUND
+        assert admin_client.get(
+            '/api/v1/export/titles.xml'
+        ).status_code == HTTPStatus.NOT_FOUND
@@ -0,0 +1,78 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18NestedRoutes:
+
+    def make_reviews(self, user):
+        from reviews.models import Category, Review, Title
+        category = Category.objects.create(name='Фильм', slug='films')
+        titles = [
+            Title.objects.create(name=name, year=2000, category=category)
+            for name in ('Первое', 'Второе')
+        ]
+        review = Review.objects.create(
+            title=titles[0], author=user, text='Отзыв', score=7
+        )
+        return titles, review
+
+    def test_01_comment_path_is_validated(self, user, user_client):
+        titles, review = self.make_reviews(user)
+        wrong_url = (
+            f'/api/v1/titles/{titles[1].id}/reviews/{review.id}/comments/'
+        )
+        assert user_client.get(wrong_url).status_code == (
+            HTTPStatus.NOT_FOUND
+        ), (
+            'Проверьте, что комментарии отзыва недоступны по адресу '
+            'чужого произведения.'
+        )
+        response = user_client.post(wrong_url, data={'text': 'Мимо'})
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        assert not review.comments.exists()
+
+        url = f'/api/v1/titles/{titles[0].id}/reviews/{review.id}/comments/'
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(url, data={'text': 'Верно'})
+        assert response.status_code == HTTPStatus.CREATED
+        review_queries = [
+            query['sql'] for query in context.captured_queries
+            if 'FROM "reviews_review"' in query['sql']
+        ]
+        assert len(review_queries) == 1, (
+            'Проверьте, что отзыв и произведение из адреса загружаются '
+            'одним запросом за запрос к API.'
+        )
+
+    def test_02_duplicate_review_uses_constraint(self, user, user_client):
+        titles, review = self.make_reviews(user)
+        url = f'/api/v1/titles/{titles[0].id}/reviews/'
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(url, data={'text': 'Еще', 'score': 5})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert 'non_field_errors' in response.json()
+        title_queries = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+            and 'FROM "reviews_title"' in query['sql']
+        ]
+        assert len(title_queries) == 1, (
+            'Проверьте, что произведение загружается один раз за запрос.'
+        )
+        assert not any(
+            query['sql'].startswith('SELECT')
+            and 'FROM "reviews_review"' in query['sql']
+            for query in context.captured_queries
+        ), (
+            'Проверьте, что повторный отзыв определяется по ограничению '
+            'unique_author_title, а не предварительным запросом.'
+        )
+        response = user_client.post(
+            f'/api/v1/titles/{titles[1].id}/reviews/',
+            data={'text': 'Другое', 'score': 5}
+        )
+        assert response.status_code == HTTPStatus.CREATED
@@ -0,0 +1,78 @@
+import json
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19TitleBulk:
+
+    URL = '/api/v1/titles/bulk/'
+
+    def make_catalog(self):
+        from reviews.models import Category, Genre
+        Category.objects.create(name='Фильм', slug='films')
+        Genre.objects.create(name='Драма', slug='drama')
+        Genre.objects.create(name='Комедия', slug='comedy')
+
+    def test_01_bulk_create_with_per_item_results(self, admin_client):
+        from reviews.models import Title
+        self.make_catalog()
+        items = [
+            {'name': f'Фильм {idx}', 'year': 2000, 'category': 'films',
+             'genre': ['drama', 'comedy']}
+            for idx in range(30)
+        ]
+        items[3]['year'] = 3000
+        items[5]['genre'] = ['drama', 'unknown']
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(self.URL, data=items, format='json')
+        assert response.status_code == HTTPStatus.CREATED
+        data = response.json()
+        assert data['created'] == 28 and data['failed'] == 2
+        results = data['results']
+        assert [result['index'] for result in results] == list(range(30))
+        assert 'year' in results[3]['errors']
+        assert 'genre' in results[5]['errors']
+        assert Title.objects.count() == 28
+        title = Title.objects.get(pk=results[0]['id'])
+        assert sorted(title.genre.values_list('slug', flat=True)) == [
+            'comedy', 'drama'
+        ]
+        lookups = [
+            query['sql'] for query in context.captured_queries
+            if 'FROM "reviews_genre"' in query['sql']
+        ]
+        assert len(lookups) == 1, (
+            'Проверьте, что слаги всех элементов пакета разрешаются одним '
+            'запросом.'
+        )
+
+    def test_02_bulk_create_from_ndjson(self, admin_client, user_client):
+        from reviews.models import Title
+        self.make_catalog()
+        body = '\n'.join(json.dumps(
+            {'name': f'Фильм {idx}', 'year': 2000, 'category': 'films',
+             'genre': ['drama']}, ensure_ascii=False
+        ) for idx in range(3))
+        response = user_client.post(
+            self.URL, data=body, content_type='application/x-ndjson'
+        )
+        assert response.status_code == HTTPStatus.FORBIDDEN
+        response = admin_client.post(
+            self.URL, data=body, content_type='application/x-ndjson'
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        assert Title.objects.count() == 3
+
+        response = admin_client.post(
+            self.URL, data={'name': 'Один'}, format='json'
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        response = admin_client.post(
+            self.URL, data='{"name": 1}\nnot json',
+            content_type='application/x-ndjson'
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
@@ -0,0 +1,110 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+URL = '/api/v1/moderation/'
+
+
+def make_discussion(count):
+    from reviews.models import Category, Comment, Review, Title, User
+    category = Category.objects.create(name='Фильм', slug='films')
+    titles = [
+        Title.objects.create(name=name, year=2000, category=category)
+        for name in ('Первое', 'Второе')
+    ]
+    reviews = []
+    for idx in range(count):
+        author = User.objects.create(
+            username=f'spammer{idx}', email=f'spammer{idx}@yamdb.fake'
+        )
+        review = Review.objects.create(
+            title=titles[idx % 2], author=author, text='Спам',
+            score=idx % 10 + 1
+        )
+        Comment.objects.create(review=review, author=author, text='Спам')
+        reviews.append(review)
+    return titles, reviews
+
+
+def assert_ratings_match_visible_reviews(titles):
+    for title in titles:
+        title.refresh_from_db()
+        scores = list(title.reviews.filter(
+            is_hidden=False
+        ).values_list('score', flat=True))
+        assert title.review_count == len(scores)
+        assert title.rating == (sum(scores) / len(scores) if scores else None)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20Moderation:
+
+    def test_01_batch_delete(self, moderator_client, user_client):
+        from reviews.models import Comment, Review
+        titles, reviews = make_discussion(10)
+        data = {
+            'action': 'delete',
+            'reviews': [review.id for review in reviews[:6]],
+            'comments': list(Comment.objects.filter(
+                review__in=reviews[6:8]
+            ).values_list('id', flat=True)),
+        }
+        assert user_client.post(
+            URL, data=data, format='json'
+        ).status_code == HTTPStatus.FORBIDDEN
+        with CaptureQueriesContext(connection) as context:
+            response = moderator_client.post(URL, data=data, format='json')
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['reviews'] == 6
+        assert response.json()['comments'] == 2
+        assert Review.objects.count() == 4
+        assert Comment.objects.count() == 2
+        rating_updates = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('UPDATE "reviews_title"')
+        ]
+        assert len(rating_updates) <= 1, (
+            'Проверьте, что рейтинг пересчитывается одним запросом для '
+            'всех затронутых произведений, а не на каждый отзыв.'
+        )
+        assert len(context.captured_queries) <= 10
+        assert_ratings_match_visible_reviews(titles)
+
+    def test_02_batch_hide(self, moderator_client, client):
+        from reviews.models import Review
+        titles, reviews = make_discussion(6)
+        hidden = reviews[:3]
+        response = moderator_client.post(URL, data={
+            'action': 'hide', 'reviews': [review.id for review in hidden]
+        }, format='json')
+        assert response.status_code == HTTPStatus.OK
+        assert Review.objects.filter(is_hidden=True).count() == 3
+        assert_ratings_match_visible_reviews(titles)
+
+        response = client.get(f'/api/v1/titles/{titles[0].id}/reviews/')
+        visible_ids = {review['id'] for review in response.json()['results']}
+        assert not visible_ids & {review.id for review in hidden}, (
+            'Проверьте, что скрытые отзывы не выводятся в списке.'
+        )
+        review = hidden[0]
+        response = client.get(
+            f'/api/v1/titles/{review.title_id}/reviews/{review.id}/comments/'
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+        review = Review.objects.get(pk=review.pk)
+        review.text = 'Исправлено'
+        review.save()
+        review.delete()
+        assert_ratings_match_visible_reviews(titles)
+
+    def test_03_invalid_batch(self, moderator_client):
+        assert moderator_client.post(URL, data={
+            'action': 'hide'
+        }, format='json').status_code == HTTPStatus.BAD_REQUEST
+        assert moderator_client.post(URL, data={
+            'action': 'purge', 'reviews': [1]
+        }, format='json').status_code == HTTPStatus.BAD_REQUEST
@@ -0,0 +1,209 @@
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+
+def make_title_with_reviews(count):
+    from reviews.models import Category, Comment, Genre, Review, Title, User
+    category = Category.objects.create(name='Фильм', slug='films')
+    genre = Genre.objects.create(name='Драма', slug='drama')
+    title = Title.objects.create(name='Хит', year=2000, category=category)
+    title.genre.add(genre)
+    authors = []
+    for idx in range(count):
+        author = User.objects.create(
+            username=f'reader{idx}', email=f'reader{idx}@yamdb.fake'
+        )
+        review = Review.objects.create(
+            title=title, author=author, text='Отзыв', score=idx % 10 + 1
+        )
+        Comment.objects.create(review=review, author=author, text='Да')
+        authors.append(author)
+    return title, authors
+
+
+def purge():
+    call_command(
+        'purge_deleted', '--once', '--chunk-size', '2', stdout=StringIO()
+    )
+
+
+@pytest.fixture
+def small_sync_limit(monkeypatch):
+    monkeypatch.setattr('api.deletion.PURGE_SYNC_LIMIT', 3)
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.usefixtures('small_sync_limit')
+class Test21DeferredDelete:
+
+    def test_01_large_title_is_marked_then_purged(self, admin_client,
+                                                  client):
+        from reviews.models import Comment, Review, Title
+        title, _ = make_title_with_reviews(5)
+        url = f'/api/v1/titles/{title.id}/'
+        response = admin_client.delete(url)
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert Title.objects.filter(
+            pk=title.pk, deleted_at__isnull=False
+        ).exists(), (
+            'Проверьте, что крупное произведение при удалении только '
+            'помечается удаленным.'
+        )
+        assert Review.objects.filter(title=title).count() == 5
+        assert client.get(url).status_code == HTTPStatus.NOT_FOUND
+        assert client.get('/api/v1/titles/').json()['count'] == 0
+        assert client.get(
+            f'{url}reviews/'
+        ).status_code == HTTPStatus.NOT_FOUND
+
+        purge()
+        assert not Title.objects.filter(pk=title.pk).exists()
+        assert not Review.objects.exists() and not Comment.objects.exists()
+
+    def test_02_small_title_is_deleted_at_once(self, admin_client):
+        from reviews.models import Title
+        title, _ = make_title_with_reviews(0)
+        response = admin_client.delete(f'/api/v1/titles/{title.id}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert not Title.objects.filter(pk=title.pk).exists()
+
+    def test_03_large_user_is_marked_then_purged(self, admin_client):
+        from reviews.models import Review, Title, User
+        title, authors = make_title_with_reviews(3)
+        author = authors[0]
+        Review.objects.create(
+            title=Title.objects.create(name='Другое', year=2001),
+            author=author, text='Еще', score=10
+        )
+        response = admin_client.delete(f'/api/v1/users/{author.username}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        author.refresh_from_db()
+        assert author.deleted_at is not None and not author.is_active
+        assert admin_client.get(
+            f'/api/v1/users/{author.username}/'
+        ).status_code == HTTPStatus.NOT_FOUND
+
+        purge()
+        assert not User.objects.filter(pk=author.pk).exists()
+        title.refresh_from_db()
+        scores = list(title.reviews.values_list('score', flat=True))
+        assert title.review_count == len(scores) == 2
+        assert title.rating == sum(scores) / len(scores), (
+            'Проверьте, что после очистки отзывов пользователя рейтинг '
+            'произведений пересчитан.'
+        )
+
+    def test_04_large_category_is_marked_then_purged(self, admin_client,
+                                                     client):
+        from reviews.models import Category, Title
+        category = Category.objects.create(name='Книга', slug='books')
+        Title.objects.bulk_create(
+            Title(name=f'Книга {idx}', year=2000, category=category)
+            for idx in range(5)
+        )
+        response = admin_client.delete('/api/v1/categories/books/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert client.get('/api/v1/categories/').json()['count'] == 0
+        titles = client.get('/api/v1/titles/').json()['results']
+        assert [title['category'] for title in titles] == [None] * 5, (
+            'Проверьте, что удаленная категория не выводится '
+            'в произведениях.'
+        )
+
+        purge()
+        assert not Category.objects.exists()
+        assert not Title.objects.filter(category__isnull=False).exists()
+
+    def test_05_marked_user_cannot_sign_up_or_log_in(self, admin_client,
+                                                     client):
+        from reviews.models import User
+        _, authors = make_title_with_reviews(3)
+        author = authors[0]
+        admin_client.delete(f'/api/v1/users/{author.username}/')
+        response = client.post('/api/v1/auth/signup/', data={
+            'username': author.username, 'email': author.email
+        })
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что регистрация не восстанавливает пользователя, '
+            'помеченного удаленным.'
+        )
+        User.objects.filter(pk=author.pk).update(
+            is_active=True, confirmation_code='ABCDEFGHIJ'
+        )
+        response = client.post('/api/v1/auth/token/', data={
+            'username': author.username, 'confirmation_code': 'ABCDEFGHIJ'
+        })
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_06_marked_objects_are_not_exported_or_found(self, client,
+                                                         tmp_path):
+        import csv
+        from reviews.models import Category, Title
+        title, authors = make_title_with_reviews(3)
+        kept = Title.objects.create(
+            name='Живое', year=2001, category=title.category
+        )
+        authors[1].mark_deleted()
+        title.mark_deleted()
+        call_command('export_data', '--path', str(tmp_path), stdout=StringIO())
+
+        def ids(file_name, column='id'):
+            with open(tmp_path / file_name, newline='', encoding='utf-8') as f:
+                return sorted(row[column] for row in csv.DictReader(f))
+
+        assert ids('titles.csv') == [str(kept.pk)], (
+            'Проверьте, что помеченные удаленными произведения не '
+            'выгружаются.'
+        )
+        assert ids('genre_title.csv') == []
+        assert ids('review.csv') == [] and ids('comments.csv') == []
+        assert str(authors[1].pk) not in ids('users.csv')
+
+        Category.objects.get(pk=title.category_id).mark_deleted()
+        call_command('export_data', '--path', str(tmp_path), stdout=StringIO())
+        assert ids('category.csv') == []
+        assert ids('titles.csv', 'category') == [''], (
+            'Проверьте, что удаленная категория выгружается пустой.'
+        )
+        response = client.get('/api/v1/titles/?category=films')
+        assert response.json()['count'] == 0, (
+            'Проверьте, что фильтр не находит помеченную удаленной '
+            'категорию.'
+        )
+
+    def test_07_marked_user_content_is_hidden(self, admin_client, client,
+                                              monkeypatch):
+        from reviews.models import Comment, Review
+        monkeypatch.setattr('api.deletion.PURGE_SYNC_LIMIT', 0)
+        title, authors = make_title_with_reviews(3)
+        kept = Review.objects.get(author=authors[0])
+        Comment.objects.create(review=kept, author=authors[1], text='Нет')
+        gone = Review.objects.get(author=authors[1])
+        response = admin_client.delete(f'/api/v1/users/{authors[1].username}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert Review.objects.filter(pk=gone.pk).exists()
+
+        url = f'/api/v1/titles/{title.id}/'
+        authors_shown = {
+            review['author']
+            for review in client.get(f'{url}reviews/').json()['results']
+        }
+        assert authors_shown == {'reader0', 'reader2'}, (
+            'Проверьте, что отзывы пользователя, помеченного удаленным, '
+            'не выводятся, как и в выгрузке.'
+        )
+        assert client.get(url).json()['rating'] == 2, (
+            'Проверьте, что оценки пользователя, помеченного удаленным, '
+            'не учитываются в рейтинге.'
+        )
+        assert client.get(f'{url}stats/').json()['count'] == 2
+        assert client.get(
+            f'{url}reviews/{gone.id}/'
+        ).status_code == HTTPStatus.NOT_FOUND
+        comments = client.get(
+            f'{url}reviews/{kept.id}/comments/'
+        ).json()['results']
+        assert [comment['text'] for comment in comments] == ['Да']
@@ -0,0 +1,99 @@
+from statistics import mean, median, pvariance
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def make_reviews(scores):
+    from reviews.models import Review, Title, User
+    title = Title.objects.create(name='Фильм', year=2000)
+    reviews = []
+    for idx, score in enumerate(scores):
+        author = User.objects.create(
+            username=f'critic{idx}', email=f'critic{idx}@yamdb.fake'
+        )
+        reviews.append(Review.objects.create(
+            title=title, author=author, text='Отзыв', score=score
+        ))
+    return title, reviews
+
+
+def check_stats(client, title):
+    from reviews.models import Review
+    scores = list(Review.objects.filter(
+        title=title, is_hidden=False
+    ).values_list('score', flat=True))
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(f'/api/v1/titles/{title.id}/stats/')
+    assert response.status_code == 200
+    data = response.json()
+    assert data['count'] == len(scores)
+    assert data['distribution'] == {
+        str(score): scores.count(score) for score in range(1, 11)
+    }
+    assert data['mean'] == pytest.approx(mean(scores))
+    assert data['variance'] == pytest.approx(pvariance(scores))
+    assert data['median'] == pytest.approx(median(scores))
+    return len(context.captured_queries)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22TitleStats:
+
+    def test_01_stats_follow_review_changes(self, client, moderator_client):
+        from reviews.models import Review
+        title, reviews = make_reviews([10, 7, 7, 3, 9, 1])
+        check_stats(client, title)
+
+        reviews[0].score = 2
+        reviews[0].save()
+        check_stats(client, title)
+        reviews[1].delete()
+        check_stats(client, title)
+        moderator_client.post('/api/v1/moderation/', data={
+            'action': 'hide', 'reviews': [reviews[2].id]
+        }, format='json')
+        check_stats(client, title)
+        review = Review.objects.get(pk=reviews[3].pk)
+        review.score = 8
+        review.save()
+        assert check_stats(client, title) == 2, (
+            'Проверьте, что статистика читается из одной строки '
+            'гистограммы независимо от числа отзывов.'
+        )
+
+    def test_02_empty_and_missing_title(self, client):
+        from reviews.models import Title
+        title = Title.objects.create(name='Пусто', year=2000)
+        response = client.get(f'/api/v1/titles/{title.id}/stats/')
+        assert response.json()['count'] == 0
+        assert response.json()['median'] is None
+        assert client.get('/api/v1/titles/999/stats/').status_code == 404
+
+    def test_03_stats_get_is_read_only(self, client):
+        from reviews.models import Review, ScoreHistogram, User
+        title, reviews = make_reviews([4, 6])
+        ScoreHistogram.objects.filter(title=title).delete()
+        with CaptureQueriesContext(connection) as context:
+            check_stats(client, title)
+        writes = [
+            query['sql'] for query in context.captured_queries
+            if not query['sql'].lstrip().upper().startswith('SELECT')
+        ]
+        assert not writes, (
+            'Проверьте, что GET-запрос статистики ничего не пишет в базу.'
+        )
+        assert not ScoreHistogram.objects.filter(title=title).exists()
+
+        author = User.objects.create(
+            username='latecomer', email='latecomer@yamdb.fake'
+        )
+        Review.objects.create(
+            title=title, author=author, text='Отзыв', score=6
+        )
+        histogram = ScoreHistogram.objects.get(title=title)
+        assert (histogram.score_4, histogram.score_6) == (1, 2), (
+            'Проверьте, что строка гистограммы создаётся при записи '
+            'отзыва и учитывает уже существующие оценки.'
+        )
@@ -0,0 +1,97 @@
+from http import HTTPStatus
+
+import pytest
+
+
+def make_title(name, scores, category=None):
+    from reviews.models import Review, Title, User
+    title = Title.objects.create(name=name, year=2000, category=category)
+    for score in scores:
+        index = User.objects.count()
+        author = User.objects.create(
+            username=f'critic{index}', email=f'critic{index}@yamdb.fake'
+        )
+        Review.objects.create(
+            title=title, author=author, text='Отзыв', score=score
+        )
+    return title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23Leaderboard:
+
+    TOP_URL = '/api/v1/titles/top/'
+
+    def names(self, response):
+        assert response.status_code == HTTPStatus.OK
+        return [title['name'] for title in response.json()]
+
+    def test_01_top_titles(self, client):
+        from reviews.models import Category
+        movie = Category.objects.create(name='Фильм', slug='movie')
+        make_title('Один', [10])
+        make_title('Много', [9, 9, 9, 9, 9, 9, 9, 9])
+        make_title('Средне', [6, 7], category=movie)
+        make_title('Слабо', [2, 3], category=movie)
+        make_title('Без оценок', [])
+
+        assert self.names(client.get(self.TOP_URL)) == [
+            'Один', 'Много', 'Средне', 'Слабо'
+        ], (
+            f'Проверьте, что `{self.TOP_URL}` возвращает произведения с '
+            'оценками по убыванию рейтинга.'
+        )
+        assert self.names(client.get(f'{self.TOP_URL}?by=weighted')) == [
+            'Много', 'Один', 'Средне', 'Слабо'
+        ], (
+            'Проверьте, что взвешенный рейтинг учитывает число отзывов.'
+        )
+        assert self.names(client.get(f'{self.TOP_URL}?limit=2')) == [
+            'Один', 'Много'
+        ]
+        assert self.names(
+            client.get(f'{self.TOP_URL}?category=movie')
+        ) == ['Средне', 'Слабо']
+        for query in ('by=votes', 'limit=0', 'limit=1000', 'limit=x'):
+            response = client.get(f'{self.TOP_URL}?{query}')
+            assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_02_weighted_rating_follows_reviews(self):
+        from api_yamdb.settings import RATING_PRIOR_MEAN, RATING_PRIOR_WEIGHT
+        from reviews.models import Review, Title
+        title = make_title('Один', [10, 4])
+        expected = (
+            (RATING_PRIOR_WEIGHT * RATING_PRIOR_MEAN + 14)
+            / (RATING_PRIOR_WEIGHT + 2)
+        )
+        title.refresh_from_db()
+        assert title.weighted_rating == pytest.approx(expected)
+        Review.objects.filter(title=title).delete()
+        Title.objects.filter(pk=title.pk).recalculate_rating()
+        title.refresh_from_db()
+        assert title.weighted_rating is None
+
+    def test_03_titles_ordering_by_rating(self, client):
+        make_title('Один', [10])
+        make_title('Два', [5])
+        make_title('Три', [])
+        make_title('Четыре', [7])
+        make_title('Пять', [])
+        response = client.get('/api/v1/titles/?ordering=-rating')
+        assert [
+            title['name'] for title in response.json()['results']
+        ][:3] == ['Один', 'Четыре', 'Два'], (
+            'Проверьте, что список произведений сортируется по рейтингу.'
+        )
+
+        names = []
+        url = '/api/v1/titles/?ordering=-rating&cursor=&limit=2'
+        while url:
+            data = client.get(url).json()
+            names.extend(title['name'] for title in data['results'])
+            url = data['next']
+        assert names[:3] == ['Один', 'Четыре', 'Два']
+        assert sorted(names[3:]) == ['Пять', 'Три'], (
+            'Проверьте, что курсорная пагинация по рейтингу проходит '
+            'и произведения без оценок.'
+        )
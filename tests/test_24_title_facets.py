@@ -0,0 +1,90 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def fill_facet_catalog():
+    from reviews.models import Category, Genre, Title
+    movie = Category.objects.create(name='Фильм', slug='movie')
+    book = Category.objects.create(name='Книга', slug='book')
+    drama = Genre.objects.create(name='Драма', slug='drama')
+    comedy = Genre.objects.create(name='Комедия', slug='comedy')
+    for name, year, category, genres in (
+        ('Первый', 2001, movie, (drama,)),
+        ('Второй', 2001, movie, (drama, comedy)),
+        ('Третий', 2002, book, (comedy,)),
+        ('Четвертый', 2003, None, ()),
+    ):
+        title = Title.objects.create(name=name, year=year, category=category)
+        title.genre.set(genres)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24TitleFacets:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def test_01_facets_for_filtered_titles(self, client):
+        fill_facet_catalog()
+        response = client.get(
+            f'{self.TITLES_URL}?facets=genre,category,year&limit=1'
+        )
+        assert response.status_code == HTTPStatus.OK
+        facets = response.json()['facets']
+        assert facets == {
+            'genre': [
+                {'slug': 'comedy', 'name': 'Комедия', 'count': 2},
+                {'slug': 'drama', 'name': 'Драма', 'count': 2},
+            ],
+            'category': [
+                {'slug': 'movie', 'name': 'Фильм', 'count': 2},
+                {'slug': 'book', 'name': 'Книга', 'count': 1},
+            ],
+            'year': [
+                {'value': 2003, 'count': 1},
+                {'value': 2002, 'count': 1},
+                {'value': 2001, 'count': 2},
+            ],
+        }, (
+            f'Проверьте, что `{self.TITLES_URL}?facets=` возвращает '
+            'счетчики по всем отфильтрованным произведениям, а не по '
+            'странице.'
+        )
+
+        response = client.get(
+            f'{self.TITLES_URL}?genre=drama&facets=genre,year'
+        )
+        assert response.json()['facets'] == {
+            'genre': [
+                {'slug': 'drama', 'name': 'Драма', 'count': 2},
+                {'slug': 'comedy', 'name': 'Комедия', 'count': 1},
+            ],
+            'year': [{'value': 2001, 'count': 2}],
+        }, (
+            'Проверьте, что фасеты считаются с учетом фильтров запроса.'
+        )
+        response = client.get(f'{self.TITLES_URL}?name=Трет&facets=year')
+        assert response.json()['facets'] == {
+            'year': [{'value': 2002, 'count': 1}]
+        }
+
+    def test_02_facet_queries(self, client):
+        fill_facet_catalog()
+        with CaptureQueriesContext(connection) as plain:
+            client.get(self.TITLES_URL)
+        with CaptureQueriesContext(connection) as faceted:
+            response = client.get(
+                f'{self.TITLES_URL}?facets=genre,category,year'
+            )
+        assert response.status_code == HTTPStatus.OK
+        assert len(faceted.captured_queries) == (
+            len(plain.captured_queries) + 3
+        ), 'Проверьте, что каждый фасет считается одним запросом.'
+        assert 'facets' not in client.get(self.TITLES_URL).json()
+
+    def test_03_unknown_facet(self, client):
+        response = client.get(f'{self.TITLES_URL}?facets=genre,author')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert 'facets' in response.json()
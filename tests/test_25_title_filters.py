@@ -0,0 +1,67 @@
+from http import HTTPStatus
+
+import pytest
+
+
+def fill_filter_catalog():
+    from reviews.models import Category, Genre, Title
+    movie = Category.objects.create(name='Фильм', slug='movie')
+    book = Category.objects.create(name='Книга', slug='book')
+    music = Category.objects.create(name='Музыка', slug='music')
+    drama = Genre.objects.create(name='Драма', slug='drama')
+    comedy = Genre.objects.create(name='Комедия', slug='comedy')
+    rock = Genre.objects.create(name='Рок', slug='rock')
+    for name, year, category, genres in (
+        ('Альфа', 1989, movie, (drama,)),
+        ('Бета', 1990, movie, (drama, comedy)),
+        ('Гамма', 1995, book, (comedy,)),
+        ('Дельта', 1999, music, (rock,)),
+        ('Эпсилон', 2005, book, (drama, comedy, rock)),
+    ):
+        title = Title.objects.create(name=name, year=year, category=category)
+        title.genre.set(genres)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25TitleFilters:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def names(self, client, query):
+        response = client.get(f'{self.TITLES_URL}?{query}')
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert data['count'] == len(data['results'])
+        return [title['name'] for title in data['results']]
+
+    def test_01_multi_value_filters(self, client):
+        fill_filter_catalog()
+        assert self.names(client, 'genre=drama,comedy') == [
+            'Альфа', 'Бета', 'Гамма', 'Эпсилон'
+        ], (
+            'Проверьте, что жанры через запятую объединяются по «или» '
+            'и произведения не повторяются.'
+        )
+        assert self.names(client, 'genre=drama,comedy&genre_mode=all') == [
+            'Бета', 'Эпсилон'
+        ], 'Проверьте, что genre_mode=all требует все перечисленные жанры.'
+        assert self.names(client, 'category=book,music') == [
+            'Гамма', 'Дельта', 'Эпсилон'
+        ]
+        assert self.names(client, 'genre=drama') == [
+            'Альфа', 'Бета', 'Эпсилон'
+        ]
+
+    def test_02_year_range(self, client):
+        fill_filter_catalog()
+        assert self.names(client, 'year_min=1990&year_max=1999') == [
+            'Бета', 'Гамма', 'Дельта'
+        ], 'Проверьте фильтрацию произведений по диапазону лет.'
+        assert self.names(
+            client, 'genre=drama,comedy&year_min=1990&year_max=1999'
+        ) == ['Бета', 'Гамма']
+        assert self.names(client, 'year_min=2000') == ['Эпсилон']
+
+    def test_03_invalid_genre_mode(self, client):
+        response = client.get(f'{self.TITLES_URL}?genre_mode=some')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
@@ -0,0 +1,129 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.test_25_title_filters import fill_filter_catalog
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.usefixtures('in_memory_indexes')
+class Test26TitlePostings:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def names(self, client, query, joins=False):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(f'{self.TITLES_URL}?{query}')
+        assert response.status_code == HTTPStatus.OK
+        if not joins:
+            # Ни фильтра по слагам в SQL, ни перестройки индекса.
+            assert not any(
+                '"slug" IN' in item['sql']
+                or 'FROM "reviews_title_genre"' in item['sql']
+                for item in context.captured_queries
+            ), (
+                'Проверьте, что фильтры по жанрам решаются индексом в '
+                'памяти без обращения к таблице связей.'
+            )
+        return sorted(title['name'] for title in response.json()['results'])
+
+    def test_01_filters_use_postings(self, client):
+        fill_filter_catalog()
+        self.names(client, 'genre=drama', joins=True)
+        assert self.names(client, 'genre=drama,comedy&genre_mode=all') == [
+            'Бета', 'Эпсилон'
+        ]
+        assert self.names(
+            client, 'genre=drama,comedy&year_min=1990&year_max=1999'
+        ) == ['Бета', 'Гамма']
+        assert self.names(client, 'category=book&year=2005') == ['Эпсилон']
+        assert self.names(client, 'genre=unknown') == []
+
+    def test_02_postings_follow_title_writes(self, client, admin_client):
+        from reviews.models import Title
+        fill_filter_catalog()
+        self.names(client, 'genre=rock', joins=True)
+        response = admin_client.post(self.TITLES_URL, data={
+            'name': 'Зета', 'year': 1995, 'category': 'music',
+            'genre': ['rock']
+        }, format='json')
+        assert response.status_code == HTTPStatus.CREATED
+        zeta = response.json()['id']
+        assert self.names(client, 'genre=rock') == [
+            'Дельта', 'Зета', 'Эпсилон'
+        ], 'Проверьте, что новое произведение попадает в индекс жанров.'
+        assert self.names(client, 'category=music&year=1995') == ['Зета']
+
+        admin_client.patch(f'{self.TITLES_URL}{zeta}/', data={
+            'genre': ['comedy'], 'year': 1996, 'category': 'book'
+        }, format='json')
+        assert self.names(client, 'genre=rock') == ['Дельта', 'Эпсилон']
+        assert self.names(client, 'genre=comedy&year=1996') == ['Зета']
+        assert self.names(client, 'category=music') == ['Дельта']
+
+        admin_client.delete(f'{self.TITLES_URL}{zeta}/')
+        assert self.names(client, 'genre=comedy&year=1996') == []
+        Title.objects.get(name='Альфа').mark_deleted()
+        assert self.names(client, 'genre=drama') == ['Бета', 'Эпсилон']
+
+    def test_03_slug_changes_and_invalidation(self, client):
+        from reviews.models import Genre, Title
+        from reviews.postings import invalidate_postings
+        fill_filter_catalog()
+        self.names(client, 'genre=rock', joins=True)
+        rock = Genre.objects.get(slug='rock')
+        rock.slug = 'metal'
+        rock.save()
+        assert self.names(client, 'genre=metal') == ['Дельта', 'Эпсилон']
+        assert self.names(client, 'genre=rock') == []
+
+        Title.genre.through.objects.create(
+            title=Title.objects.get(name='Альфа'), genre=rock
+        )
+        invalidate_postings()
+        assert self.names(client, 'genre=metal', joins=True) == [
+            'Альфа', 'Дельта', 'Эпсилон'
+        ], (
+            'Проверьте, что после записи в обход сигналов индекс '
+            'перестраивается.'
+        )
+        rock.delete()
+        assert self.names(client, 'genre=metal') == []
+
+    def test_04_large_matches_fall_back_to_sql(self, client, monkeypatch):
+        from reviews.models import Title
+        from reviews.postings import postings
+        fill_filter_catalog()
+        self.names(client, 'genre=drama', joins=True)
+        monkeypatch.setattr('api.filters.TITLE_POSTINGS_MAX_IDS', 2)
+        assert postings.find(genres=['drama'], limit=2) is None, (
+            'Проверьте, что индекс отказывается от запроса, как только '
+            'совпадений больше лимита.'
+        )
+        assert postings.find(
+            genres=['drama', 'comedy'], genre_mode='all', year_min=2000,
+            limit=2
+        ) == [Title.objects.get(name='Эпсилон').pk]
+        assert self.names(client, 'genre=drama', joins=True) == [
+            'Альфа', 'Бета', 'Эпсилон'
+        ]
+        assert self.names(client, 'genre=drama,comedy&genre_mode=all') == [
+            'Бета', 'Эпсилон'
+        ]
+
+    def test_05_local_cache_falls_back_to_sql(self, client, monkeypatch):
+        from reviews.postings import postings
+        monkeypatch.setattr('reviews.postings.IN_MEMORY_INDEXES', False)
+        fill_filter_catalog()
+        assert postings.find(genres=['drama']) is None, (
+            'Проверьте, что без общего кэша индекс в памяти не '
+            'используется.'
+        )
+        assert self.names(
+            client, 'genre=drama,comedy&genre_mode=all', joins=True
+        ) == ['Бета', 'Эпсилон']
+        assert self.names(client, 'category=book&year=2005', joins=True) == [
+            'Эпсилон'
+        ]
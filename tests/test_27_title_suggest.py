@@ -0,0 +1,150 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.test_23_leaderboard import make_title
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.usefixtures('in_memory_indexes')
+class Test27TitleSuggest:
+
+    URL = '/api/v1/titles/suggest/'
+
+    def suggest(self, client, query, queries=None):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(self.URL, {'q': query})
+        assert response.status_code == HTTPStatus.OK
+        if queries is not None:
+            assert len(context.captured_queries) == queries, (
+                'Проверьте, что подсказки отдаются из индекса в памяти '
+                'без запросов к базе.'
+            )
+        return [title['name'] for title in response.json()]
+
+    def test_01_prefix_ranked_by_rating(self, client):
+        make_title('Звёздные войны', [6])
+        make_title('Звездный путь', [9])
+        make_title('Война и мир', [8])
+        make_title('Зверополис', [])
+        make_title('Мир Юрского периода', [3])
+
+        assert self.suggest(client, 'зве') == [
+            'Звездный путь', 'Звёздные войны', 'Зверополис'
+        ], (
+            f'Проверьте, что `{self.URL}` находит названия по префиксу '
+            'без учета регистра и сортирует их по рейтингу.'
+        )
+        assert self.suggest(client, 'МИР', queries=0) == [
+            'Война и мир', 'Мир Юрского периода'
+        ], 'Проверьте, что префикс ищется в начале любого слова.'
+        assert self.suggest(client, 'звездн', queries=0) == [
+            'Звездный путь', 'Звёздные войны'
+        ]
+        response = client.get(self.URL, {'q': 'зве', 'limit': 1})
+        assert response.json() == [
+            {'id': response.json()[0]['id'], 'name': 'Звездный путь',
+             'rating': 9}
+        ]
+        for params in ({}, {'q': ' '}, {'q': 'а', 'limit': 0}):
+            response = client.get(self.URL, params)
+            assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_02_index_follows_writes(self, client, admin_client):
+        from reviews.models import Category, Genre, Review, Title, User
+        Category.objects.create(name='Фильм', slug='movie')
+        Genre.objects.create(name='Фантастика', slug='sci-fi')
+        star = make_title('Звездный путь', [5])
+        self.suggest(client, 'зв')
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': 'Звездная пыль', 'year': 2007, 'genre': ['sci-fi'],
+            'category': 'movie'
+        })
+        assert response.status_code == HTTPStatus.CREATED
+        dust = Title.objects.get(name='Звездная пыль')
+        assert self.suggest(client, 'зв', queries=0) == [
+            'Звездный путь', 'Звездная пыль'
+        ], 'Проверьте, что новое произведение попадает в подсказки.'
+
+        author = User.objects.create(username='fan', email='fan@yamdb.fake')
+        Review.objects.create(title=dust, author=author, text='!', score=9)
+        assert self.suggest(client, 'зв', queries=0) == [
+            'Звездная пыль', 'Звездный путь'
+        ], 'Проверьте, что порядок подсказок следует за рейтингом.'
+
+        admin_client.patch(
+            f'/api/v1/titles/{star.id}/', data={'name': 'Стартрек'},
+            format='json'
+        )
+        assert self.suggest(client, 'зв', queries=0) == ['Звездная пыль']
+        assert self.suggest(client, 'старт', queries=0) == ['Стартрек']
+
+        admin_client.delete(f'/api/v1/titles/{dust.id}/')
+        assert self.suggest(client, 'зв', queries=0) == []
+
+    def test_03_short_prefix_walks_ranking(self):
+        from reviews.suggest import title_names
+        for name, scores in (
+            ('Альфа', [4]), ('Альбом', [9, 7]), ('Бета альт', [8]),
+            ('Аллея', []), ('Ангар', [2]), ('Гамма', [10])
+        ):
+            make_title(name, scores)
+        expected = ['Альбом', 'Бета альт', 'Альфа', 'Ангар', 'Аллея']
+        for limit in range(1, 7):
+            assert [
+                name for _, name, _ in title_names.suggest('а', limit)
+            ] == expected[:limit], (
+                'Проверьте, что для короткого префикса подсказки '
+                'совпадают с отбором лучших среди всех совпадений.'
+            )
+        assert [
+            name for _, name, _ in title_names.suggest('ал', 2)
+        ] == ['Альбом', 'Бета альт']
+
+    def test_04_local_cache_falls_back_to_sql(self, client, monkeypatch):
+        monkeypatch.setattr('reviews.postings.IN_MEMORY_INDEXES', False)
+        make_title('Звездные войны', [6])
+        make_title('Звездный путь', [9])
+        make_title('Зверополис', [])
+        make_title('Война и мир', [8])
+        assert self.suggest(client, 'Зве') == [
+            'Звездный путь', 'Звездные войны', 'Зверополис'
+        ], (
+            'Проверьте, что без общего кэша подсказки отбираются '
+            'запросом к базе в том же порядке.'
+        )
+        assert self.suggest(client, 'мир') == ['Война и мир']
+
+    def test_05_reviews_do_not_rebuild_other_workers(self):
+        from reviews.models import Review, User
+        from reviews.suggest import TitleNames
+        star = make_title('Звездный путь', [5])
+        make_title('Звездная пыль', [7])
+        # Индекс другого процесса с тем же общим кэшем.
+        worker = TitleNames()
+        assert [name for _, name, _ in worker.suggest('зв', 10)] == [
+            'Звездная пыль', 'Звездный путь'
+        ]
+        version = worker.version
+
+        author = User.objects.create(username='fan', email='fan@yamdb.fake')
+        Review.objects.create(title=star, author=author, text='!', score=10)
+        Review.objects.create(
+            title=star,
+            author=User.objects.create(username='fan2', email='f2@ya.fake'),
+            text='!', score=10
+        )
+        worker.suggest('зв', 10)
+        assert worker.version == version, (
+            'Проверьте, что новый отзыв не заставляет другие процессы '
+            'перестраивать индекс названий.'
+        )
+        worker.refresh_due = 0
+        assert [name for _, name, _ in worker.suggest('зв', 10)] == [
+            'Звездный путь', 'Звездная пыль'
+        ], (
+            'Проверьте, что другие процессы подтягивают изменившиеся '
+            'рейтинги при сверке.'
+        )